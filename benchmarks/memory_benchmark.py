@@ -0,0 +1,93 @@
+import os
+import sys
+import random
+import argparse
+import tracemalloc
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import word
+import compactwords
+
+
+# The layout main.py kept in memory before the compact table, one dict and two lists per word
+class DictWord:
+    def __init__(self, wordName: str, definitions: list, exampleSentences: list, fileExtension: str):
+        self.word = wordName
+        self.imagePath = f'{word.dataFoldername}/{wordName}.{fileExtension}'
+        self.newImagePath = self.imagePath
+        self.imageExists = True
+        self.fileExtension = fileExtension
+        self.definitions = definitions
+        self.exampleSentences = exampleSentences
+
+
+def randomText(rng: random.Random, words: int):
+    return ' '.join(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9))) for _ in range(words))
+
+
+# Entries are kept as json text so that every build pays for its own strings, like loading words.json does
+def generateEntries(count: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(count):
+        wordName = f'Word{i}'
+        yield wordName, json.dumps({
+            'imageExists': i % 3 == 0,
+            'definitions': [randomText(rng, rng.randint(3, 8)) for _ in range(rng.randint(1, 3))],
+            'exampleSentences': [randomText(rng, rng.randint(6, 14)) for _ in range(rng.randint(0, 3))],
+            'fileExtension': 'png' if i % 3 == 0 else '',
+        })
+
+
+def measure(build, count: int, seed: int):
+    entries = list(generateEntries(count, seed))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(entries)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return (after - before) / count
+
+
+def buildDicts(entries):
+    return {''.join(key): json.loads(data) for key, data in entries}
+
+
+def buildCompactTable(entries):
+    table = compactwords.CompactWordTable()
+    return table, {sys.intern(''.join(key)): table.append(json.loads(data)) for key, data in entries}
+
+
+def buildDictWords(entries):
+    words = []
+    for key, data in entries:
+        data = json.loads(data)
+        words.append(DictWord(''.join(key), data['definitions'], data['exampleSentences'], data['fileExtension']))
+    return words
+
+
+def buildSlotWords(entries):
+    words = []
+    for key, data in entries:
+        w = word.Word()
+        w.loadFromDict(''.join(key), json.loads(data))
+        words.append(w)
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytes per word of the in-memory word representations')
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{args.count} words')
+    print(f'dict of dicts (wordDataDict):   {measure(buildDicts, args.count, args.seed):8.1f} bytes/word')
+    print(f'CompactWordTable:               {measure(buildCompactTable, args.count, args.seed):8.1f} bytes/word')
+    print(f'Word with __dict__:             {measure(buildDictWords, args.count, args.seed):8.1f} bytes/word')
+    print(f'Word with __slots__:            {measure(buildSlotWords, args.count, args.seed):8.1f} bytes/word')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5 import QtWidgets
+import word
+import wordstore
+from cli import percentile
+from memory_benchmark import randomText
+
+
+def generateEntries(count: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield f'Word{i}', {
+            'imageExists': False,
+            'imageHash': '',
+            'definitions': [randomText(rng, rng.randint(3, 8)) for _ in range(rng.randint(1, 3))],
+            'exampleSentences': [randomText(rng, rng.randint(6, 14)) for _ in range(rng.randint(0, 3))],
+            'fileExtension': '',
+        }
+
+
+# Switches menus like a user would and times each switchMenu call until the switch has been painted
+def main():
+    parser = argparse.ArgumentParser(description='Latency of switching between the menus of the main window')
+    parser.add_argument('--count', type=int, default=10000, help='words in the generated dictionary')
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workingFolder = os.getcwd()
+    folder = tempfile.mkdtemp(prefix='menu_benchmark_')
+    os.chdir(folder)
+    store = wordstore.openWordStore(word.dataFoldername)
+    store.load()
+    store.putMany(generateEntries(args.count, args.seed))
+    store.close()
+
+    app = QtWidgets.QApplication(sys.argv)
+    import main as mainWindow
+    window = mainWindow.MainWindow()
+    window.appdataDict[mainWindow.Global.GAME_PROMPT_KEY] = False
+    window.waitForWords()
+    app.processEvents()
+
+    Menu = mainWindow.Menu
+    steps = [
+        ('main -> add word', lambda: window.switchMenu(Menu.ADD_WORD)),
+        ('add word -> main', lambda: window.switchMenu(Menu.MAIN_MENU)),
+        ('main -> search', lambda: window.switchMenu(Menu.SEARCH_WORD)),
+        ('search -> main', lambda: window.switchMenu(Menu.MAIN_MENU)),
+        ('main -> surf', lambda: window.switchMenu(Menu.SURF_WORDS)),
+        ('surf next', lambda: window.surfWords_NextButton.click()),
+        ('surf -> main', lambda: window.switchMenu(Menu.MAIN_MENU)),
+        ('main -> game', lambda: window.switchMenu(Menu.PLAY_GAME)),
+        ('game -> main', lambda: window.switchMenu(Menu.MAIN_MENU)),
+    ]
+
+    timings = {name: [] for name, _ in steps}
+    firstTimings = dict()
+    for repetition in range(args.rounds + 1):
+        for name, step in steps:
+            started = time.perf_counter()
+            step()
+            app.processEvents()
+            elapsed = time.perf_counter() - started
+            if repetition == 0:
+                firstTimings[name] = elapsed
+            else:
+                timings[name].append(elapsed)
+
+    print(f'{args.count} words, {args.rounds} rounds, times in ms')
+    print(f'{"":20} {"first":>8} {"p50":>8} {"p95":>8} {"max":>8}')
+    for name, values in timings.items():
+        values.sort()
+        print(f'{name:20} {firstTimings[name] * 1000:8.2f} {percentile(values, 0.5) * 1000:8.2f} {percentile(values, 0.95) * 1000:8.2f} {values[-1] * 1000:8.2f}')
+
+    window.imageImporter.shutdown()
+    window.saveWordData()
+    window.backgroundSaver.stop()
+    os.chdir(workingFolder)
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
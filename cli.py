@@ -0,0 +1,213 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+import word
+import wordstore
+import searchindex
+
+# Command line tools for Your Dictionary that run without Qt.
+#
+#   python cli.py import words.csv
+#   python cli.py export words.jsonl
+#   python cli.py query queries.txt --bench
+#
+# csv and tsv files have the columns word, definitions and exampleSentences, several definitions or sentences
+# in one cell are separated by --list-separator. jsonl files hold one {"word", "definitions", "exampleSentences"}
+# object per line. Images are not part of the exchange formats.
+#
+# query reads one query per line from a file or stdin and answers each with one json object per line on stdout,
+# {"query", "startsWith", "includes", "similar"} like the Search Words menu lists them.
+
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+csvHeader = ['word', 'definitions', 'exampleSentences']
+
+
+# The backend the app uses for folder, stored as storage_backend in its appdata.json, json if it has none yet
+def configuredBackend(folder: str):
+    try:
+        with open(f'{folder}/appdata.json') as f:
+            backend = json.load(f).get('storage_backend', 'json')
+    except (OSError, ValueError):
+        return 'json'
+    return backend if backend in wordstore.backends else 'json'
+
+
+def detectFormat(path: str, fileFormat: str):
+    if fileFormat:
+        return fileFormat
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('csv', 'tsv', 'jsonl'):
+        return extension
+    if extension in ('ndjson', 'jsonlines'):
+        return 'jsonl'
+    raise SystemExit(f'Cannot tell the format of {path}, pass --format')
+
+
+def readRows(f, fileFormat: str, separator: str):
+    if fileFormat == 'jsonl':
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                yield row.get('word', ''), row.get('definitions', []), row.get('exampleSentences', [])
+        return
+
+    reader = csv.reader(f, delimiter='\t' if fileFormat == 'tsv' else ',')
+    for i, row in enumerate(reader):
+        if not row or (i == 0 and row == csvHeader):
+            continue
+        definitions = row[1].split(separator) if len(row) > 1 else []
+        exampleSentences = row[2].split(separator) if len(row) > 2 and row[2] else []
+        yield row[0], definitions, exampleSentences
+
+
+# Applies the same normalization as the Add Word menu and builds the entry through Word
+def toEntry(wordName: str, definitions: list, exampleSentences: list):
+    wordName = word.modifyWord(wordName)
+    definitions = list(dict.fromkeys(d for d in map(word.modifyWord, definitions) if d))
+    exampleSentences = list(dict.fromkeys(es for es in map(word.modifyWord, exampleSentences) if es))
+    if not wordName or not definitions:
+        return None
+    return wordName, word.Word(wordName, '', definitions, exampleSentences).getAsDictionary()
+
+
+# An import only brings the text of a word, a word that is already in the dictionary keeps its image
+def keepImage(data: dict, existing: dict):
+    for key in ('imageExists', 'imageHash', 'fileExtension'):
+        if key in existing:
+            data[key] = existing[key]
+
+
+def reportThroughput(action: str, count: int, started: float, final: bool = False):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f'{action} {count} words in {elapsed:.2f}s ({count / elapsed:,.0f} words/s)', file=sys.stderr, end='\n' if final else '\r')
+
+
+def importWords(args):
+    fileFormat = detectFormat(args.file, args.format)
+    store = wordstore.openWordStore(args.folder, args.backend, lazy=True)
+    store.load()
+
+    started = time.perf_counter()
+    imported, skipped = 0, 0
+    with open(args.file, encoding='utf-8', newline='') as f:
+        rows = readRows(f, fileFormat, args.list_separator)
+        while True:
+            batch = list(itertools.islice(rows, args.batch_size))
+            if not batch:
+                break
+            entries = []
+            for row in batch:
+                entry = toEntry(*row)
+                if entry is None or (args.skip_existing and entry[0] in store):
+                    skipped += 1
+                    continue
+                if entry[0] in store:
+                    keepImage(entry[1], store.get(entry[0]))
+                entries.append(entry)
+            store.putMany(entries)
+            imported += len(entries)
+            reportThroughput('Imported', imported, started)
+
+    store.close()
+    reportThroughput('Imported', imported, started, final=True)
+    if skipped:
+        print(f'Skipped {skipped} rows without a word or definition, or already in the dictionary', file=sys.stderr)
+
+
+def exportWords(args):
+    fileFormat = detectFormat(args.file, args.format)
+    store = wordstore.openWordStore(args.folder, args.backend, lazy=True)
+    store.load()
+
+    started = time.perf_counter()
+    exported = 0
+    with open(args.file, 'w', encoding='utf-8', newline='') as f:
+        writer = None if fileFormat == 'jsonl' else csv.writer(f, delimiter='\t' if fileFormat == 'tsv' else ',')
+        if writer is not None:
+            writer.writerow(csvHeader)
+        for wordName, data in store.iterEntries():
+            if writer is None:
+                f.write(json.dumps({'word': wordName, 'definitions': data['definitions'], 'exampleSentences': data['exampleSentences']}) + '\n')
+            else:
+                writer.writerow([wordName, args.list_separator.join(data['definitions']), args.list_separator.join(data['exampleSentences'])])
+            exported += 1
+            if exported % args.batch_size == 0:
+                reportThroughput('Exported', exported, started)
+
+    store.close()
+    reportThroughput('Exported', exported, started, final=True)
+
+
+def percentile(sortedValues: list, fraction: float):
+    return sortedValues[min(len(sortedValues) - 1, int(fraction * len(sortedValues)))]
+
+
+def queryWords(args):
+    store = wordstore.openWordStore(args.folder, args.backend, lazy=True)
+    store.load()
+    started = time.perf_counter()
+    wordIndex = searchindex.WordIndex(store.keys(), store.iterEntries)
+    if args.no_cache:
+        wordIndex.cacheBudget = -1
+    mode = searchindex.SearchMode.TEXT if args.mode == 'text' else searchindex.SearchMode.WORDS
+    print(f'Indexed {len(wordIndex)} words in {time.perf_counter() - started:.2f}s', file=sys.stderr)
+
+    latencies = []
+    f = sys.stdin if args.file == '-' else open(args.file, encoding='utf-8')
+    try:
+        for line in f:
+            query = line.rstrip('\r\n')
+            queryStarted = time.perf_counter()
+            startsWith, includes, similar = wordIndex.search(query, mode=mode)
+            latencies.append(time.perf_counter() - queryStarted)
+            if not args.bench:
+                print(json.dumps({'query': query, 'startsWith': startsWith[:args.limit], 'includes': includes[:args.limit], 'similar': similar[:args.limit]}))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    store.close()
+
+    if args.bench and latencies:
+        latencies.sort()
+        print(f'{len(latencies)} queries in {sum(latencies):.3f}s ({len(latencies) / max(sum(latencies), 1e-9):,.0f} queries/s)', file=sys.stderr)
+        print('latency ms: ' + ', '.join(f'{name} {percentile(latencies, fraction) * 1000:.2f}'
+                                         for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Your Dictionary without the window')
+    parser.add_argument('--folder', default=word.dataFoldername, help='dictionary data folder')
+    parser.add_argument('--backend', choices=sorted(wordstore.backends), help='word store backend, by default the one the app uses for --folder')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for name, function, helpText in (('import', importWords, 'add the words of a csv, tsv or jsonl file'),
+                                     ('export', exportWords, 'write every word to a csv, tsv or jsonl file')):
+        subparser = subparsers.add_parser(name, help=helpText)
+        subparser.add_argument('file')
+        subparser.add_argument('--format', choices=['csv', 'tsv', 'jsonl'])
+        subparser.add_argument('--list-separator', default='|', help='separates several definitions or sentences in one csv/tsv cell')
+        subparser.add_argument('--batch-size', type=int, default=10000)
+        subparser.set_defaults(function=function)
+        if name == 'import':
+            subparser.add_argument('--skip-existing', action='store_true', help='keep words that are already in the dictionary')
+
+    subparser = subparsers.add_parser('query', help='answer the queries of a file or stdin with json lines')
+    subparser.add_argument('file', nargs='?', default='-', help='one query per line, - for stdin')
+    subparser.add_argument('--mode', choices=['words', 'text'], default='words', help='search word names or definitions and sentences')
+    subparser.add_argument('--limit', type=int, default=None, help='list at most this many words of each kind per query')
+    subparser.add_argument('--bench', action='store_true', help='report queries per second and latency percentiles instead of the results')
+    subparser.add_argument('--no-cache', action='store_true', help='answer every query from the index, even repeated ones')
+    subparser.set_defaults(function=queryWords)
+
+    args = parser.parse_args()
+    if args.backend is None:
+        args.backend = configuredBackend(args.folder)
+    args.function(args)
+
+
+if __name__ == '__main__':
+    main()
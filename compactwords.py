@@ -0,0 +1,99 @@
+import sys
+from array import array
+
+
+# Stores many strings back to back in one utf-8 buffer. A string is addressed by its index,
+# its bytes sit between offsets[index] and offsets[index + 1].
+class StringPool:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offsets = array('Q', [0])
+
+    def add(self, text: str):
+        self.buffer += text.encode('utf-8')
+        self.offsets.append(len(self.buffer))
+        return len(self.offsets) - 2
+
+    def get(self, index: int):
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def getRange(self, start: int, count: int):
+        return [self.get(i) for i in range(start, start + count)]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def byteSize(self):
+        return len(self.buffer) + self.offsets.itemsize * len(self.offsets)
+
+
+# Column oriented storage for entries in the Word.getAsDictionary layout.
+# A row keeps the index of its first definition and sentence in the string pools and how many it has,
+# so a whole dictionary costs a handful of arrays instead of a dict and two lists per word.
+class CompactWordTable:
+    def __init__(self):
+        self.definitions = StringPool()
+        self.exampleSentences = StringPool()
+        self.definitionStart = array('Q')
+        self.definitionCount = array('I')
+        self.sentenceStart = array('Q')
+        self.sentenceCount = array('I')
+        self.imageExists = bytearray()
+        self.imageHashes = StringPool()
+        self.fileExtension = array('H')
+        self.extensions = []
+        self.extensionIds = dict()
+        self.garbageRows = 0
+
+    def append(self, data: dict):
+        self.definitionStart.append(len(self.definitions))
+        self.definitionCount.append(len(data['definitions']))
+        for d in data['definitions']:
+            self.definitions.add(d)
+
+        self.sentenceStart.append(len(self.exampleSentences))
+        self.sentenceCount.append(len(data['exampleSentences']))
+        for es in data['exampleSentences']:
+            self.exampleSentences.add(es)
+
+        self.imageExists.append(1 if data['imageExists'] else 0)
+        self.imageHashes.add(data.get('imageHash', ''))
+        self.fileExtension.append(self.getExtensionId(data['fileExtension']))
+        return len(self.imageExists) - 1
+
+    def getExtensionId(self, extension: str):
+        if extension not in self.extensionIds:
+            self.extensionIds[extension] = len(self.extensions)
+            self.extensions.append(sys.intern(extension))
+        return self.extensionIds[extension]
+
+    def get(self, row: int):
+        return {
+            'imageExists': bool(self.imageExists[row]),
+            'imageHash': self.imageHashes.get(row),
+            'definitions': self.definitions.getRange(self.definitionStart[row], self.definitionCount[row]),
+            'exampleSentences': self.exampleSentences.getRange(self.sentenceStart[row], self.sentenceCount[row]),
+            'fileExtension': self.extensions[self.fileExtension[row]],
+        }
+
+    # Rows are never reused, a released row only counts towards rebuilding the table
+    def release(self, row: int):
+        self.garbageRows += 1
+
+    def __len__(self):
+        return len(self.imageExists)
+
+    def needsRebuild(self):
+        return self.garbageRows > 1024 and self.garbageRows * 2 > len(self)
+
+    # Copies the given rows into a fresh table, returns it together with a map from old to new rows
+    def rebuilt(self, rows):
+        table = CompactWordTable()
+        mapping = dict()
+        for row in rows:
+            mapping[row] = table.append(self.get(row))
+        return table, mapping
+
+    def byteSize(self):
+        columns = (self.definitionStart, self.definitionCount, self.sentenceStart, self.sentenceCount, self.fileExtension)
+        return self.definitions.byteSize() + self.exampleSentences.byteSize() + self.imageHashes.byteSize() + len(self.imageExists) + sum(c.itemsize * len(c) for c in columns)
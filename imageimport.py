@@ -0,0 +1,127 @@
+import os
+import uuid
+import hashlib
+from PyQt5 import QtCore, QtGui
+
+maxImageSize = 1024
+jpegQuality = 85
+
+
+# Runs in a worker process. Decodes the image at a bounded size and encodes it again, which also
+# drops EXIF and every other kind of metadata. Returns the written path, its hash and its extension.
+def normalizeImage(sourcePath: str, outputPath: str, maxSize: int, quality: int):
+    reader = QtGui.QImageReader(sourcePath)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and (size.width() > maxSize or size.height() > maxSize):
+        reader.setScaledSize(size.scaled(maxSize, maxSize, QtCore.Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f'Could not read {sourcePath}: {reader.errorString()}')
+
+    # Images with transparency stay png, everything else becomes a jpeg
+    if image.hasAlphaChannel():
+        fileExtension, fmt, quality = 'png', 'PNG', -1
+    else:
+        fileExtension, fmt = 'jpg', 'JPG'
+    outputPath = f'{outputPath}.{fileExtension}'
+    if not image.save(outputPath, fmt, quality):
+        raise OSError(f'Could not write {outputPath}')
+
+    digest = hashlib.sha256()
+    with open(outputPath, 'rb') as f:
+        digest.update(f.read())
+    return outputPath, digest.hexdigest(), fileExtension
+
+
+class ImportJob:
+    def __init__(self, sourcePath: str):
+        self.sourcePath = sourcePath
+        self.outputPath = None
+        self.imageHash = None
+        self.fileExtension = None
+        self.error = None
+        self.done = False
+        self.callbacks = []
+
+    # Calls callback(job) on the GUI thread once the image is ready, right away if it already is
+    def whenDone(self, callback):
+        if self.done:
+            callback(self)
+        else:
+            self.callbacks.append(callback)
+
+
+# Normalizes chosen images in a pool of worker processes so the GUI thread never decodes or copies them.
+# Results land in dictionary_data/images/incoming until ImageStore.adopt moves them into the store.
+class ImageImporter(QtCore.QObject):
+    progressChanged = QtCore.pyqtSignal(int, int)
+    futureFinished = QtCore.pyqtSignal(object, object)
+
+    def __init__(self, incomingFolder: str, maxSize: int = maxImageSize, quality: int = jpegQuality, workers: int = None):
+        super().__init__()
+        self.incomingFolder = incomingFolder
+        self.maxSize = maxSize
+        self.quality = quality
+        self.workers = workers
+        self.executor = None
+        self.jobs = dict()
+        self.submitted = 0
+        self.finished = 0
+        # Futures complete on an executor thread, the queued connection brings them to the GUI thread
+        self.futureFinished.connect(self.onFutureFinished, QtCore.Qt.QueuedConnection)
+
+    def submit(self, sourcePath: str):
+        if sourcePath in self.jobs:
+            return self.jobs[sourcePath]
+        if self.executor is None:
+            # Imported here, multiprocessing takes a noticeable part of the startup time and most sessions never import an image
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            os.makedirs(self.incomingFolder, exist_ok=True)
+            # Forking this process would copy locks held by its other threads into the workers, which can deadlock
+            # the image decoding there. Spawned workers start clean and only need normalizeImage.
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+        job = ImportJob(sourcePath)
+        self.jobs[sourcePath] = job
+        self.submitted += 1
+        self.progressChanged.emit(self.finished, self.submitted)
+
+        outputPath = f'{self.incomingFolder}/{uuid.uuid4().hex}'
+        future = self.executor.submit(normalizeImage, sourcePath, outputPath, self.maxSize, self.quality)
+        future.add_done_callback(lambda f: self.futureFinished.emit(job, f))
+        return job
+
+    def submitMany(self, sourcePaths):
+        return [self.submit(path) for path in sourcePaths]
+
+    def jobFor(self, sourcePath: str):
+        return self.jobs.get(sourcePath)
+
+    def onFutureFinished(self, job: ImportJob, future):
+        try:
+            job.outputPath, job.imageHash, job.fileExtension = future.result()
+        except Exception as e:
+            job.error = e
+        job.done = True
+        self.finished += 1
+        self.progressChanged.emit(self.finished, self.submitted)
+        if self.finished == self.submitted:
+            self.submitted = self.finished = 0
+
+        for callback in job.callbacks:
+            callback(job)
+        job.callbacks.clear()
+
+    # The job is forgotten once its result has been adopted or thrown away
+    def release(self, job: ImportJob):
+        self.jobs.pop(job.sourcePath, None)
+        if job.outputPath is not None and os.path.exists(job.outputPath):
+            os.remove(job.outputPath)
+
+    # Waits for the queued images, their results are delivered by the next processEvents
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,171 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import saver
+import word
+
+
+def hashFile(path: str):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Images are stored once under the hash of their content in dictionary_data/images.
+# refs.json records which image every word uses, an image no word refers to is removed by collectGarbage.
+# refs.json is saved on its own schedule and can lag behind the word entries after a crash,
+# so collectGarbage also keeps every image an entry of entrySource refers to.
+class ImageStore:
+    def __init__(self, folder: str = word.dataFoldername, backgroundSaver: saver.BackgroundSaver = None):
+        self.folder = folder
+        self.imageFolder = f'{folder}/images'
+        self.refsPath = f'{self.imageFolder}/refs.json'
+        self.incomingFolder = f'{self.imageFolder}/incoming'
+        # Written by ThumbnailCache as <hash>_<size>.png, removed here together with their image
+        self.thumbnailFolder = f'{folder}/thumbnails'
+        self.saver = backgroundSaver
+        self.lock = threading.Lock()
+        self.refs = dict()
+        self.counts = dict()
+        self.entrySource = None
+
+    # entrySource yields (wordName, data) pairs like WordStore.iterEntries
+    def load(self, entrySource=None):
+        self.entrySource = entrySource
+        os.makedirs(self.imageFolder, exist_ok=True)
+        # Imports that were never saved to a word are left over from the last session
+        if os.path.exists(self.incomingFolder):
+            shutil.rmtree(self.incomingFolder, ignore_errors=True)
+        if os.path.exists(self.refsPath):
+            with open(self.refsPath, encoding='utf-8') as f:
+                self.refs = json.load(f)
+        self.counts = dict()
+        for filename in self.refs.values():
+            self.counts[filename] = self.counts.get(filename, 0) + 1
+
+    def pathFor(self, imageHash: str, fileExtension: str):
+        return f'{self.imageFolder}/{imageHash}.{fileExtension}'
+
+    # Copies the image into the store unless the same content is already there
+    def add(self, sourcePath: str, fileExtension: str):
+        imageHash = hashFile(sourcePath)
+        path = self.pathFor(imageHash, fileExtension)
+        if not os.path.exists(path):
+            tmpPath = path + '.tmp'
+            shutil.copyfile(sourcePath, tmpPath)
+            os.replace(tmpPath, path)
+        return imageHash
+
+    # Makes wordName use the image at sourcePath, returns its hash and its path inside the store
+    def attach(self, wordName: str, sourcePath: str, fileExtension: str):
+        # Holding the lock keeps collectGarbage from removing the file before it is referenced
+        with self.lock:
+            imageHash = self.add(sourcePath, fileExtension)
+            self.addReference(wordName, imageHash, fileExtension)
+        self.saveRefs()
+        return imageHash, self.pathFor(imageHash, fileExtension)
+
+    # Moves an image that was already normalized and hashed by the import pipeline into the store
+    def adopt(self, wordName: str, importedPath: str, imageHash: str, fileExtension: str):
+        path = self.pathFor(imageHash, fileExtension)
+        with self.lock:
+            if os.path.exists(importedPath):
+                if os.path.exists(path):
+                    os.remove(importedPath)
+                else:
+                    os.replace(importedPath, path)
+            self.addReference(wordName, imageHash, fileExtension)
+        self.saveRefs()
+        return path
+
+    def addReference(self, wordName: str, imageHash: str, fileExtension: str):
+        self.dropReference(wordName)
+        filename = f'{imageHash}.{fileExtension}'
+        self.refs[wordName] = filename
+        self.counts[filename] = self.counts.get(filename, 0) + 1
+
+    # Images saved before the image store sit next to words.json under the word's name
+    def removeLegacyImage(self, wordName: str, fileExtension: str):
+        path = f'{self.folder}/{wordName}.{fileExtension}'
+        if fileExtension and os.path.exists(path):
+            os.remove(path)
+
+    def detach(self, wordName: str):
+        with self.lock:
+            if not self.dropReference(wordName):
+                return
+        self.saveRefs()
+        self.scheduleGarbageCollection()
+
+    def dropReference(self, wordName: str):
+        filename = self.refs.pop(wordName, None)
+        if filename is None:
+            return False
+        self.counts[filename] -= 1
+        if self.counts[filename] == 0:
+            del self.counts[filename]
+        return True
+
+    def saveRefs(self):
+        with self.lock:
+            refs = json.dumps(self.refs)
+        if self.saver is None:
+            saver.atomicWrite(self.refsPath, refs)
+        else:
+            self.saver.schedule(self.refsPath, lambda: saver.atomicWrite(self.refsPath, refs))
+
+    def scheduleGarbageCollection(self):
+        if self.saver is None:
+            self.collectGarbage()
+        else:
+            self.saver.schedule(self.imageFolder, self.collectGarbage)
+
+    # Removes every stored image no word refers to and its thumbnails, returns how many files and bytes were freed.
+    # The entries are only read when refs.json leaves some image unreferenced, on most launches it leaves none.
+    def collectGarbage(self):
+        candidates = []
+        for filename in os.listdir(self.imageFolder):
+            path = f'{self.imageFolder}/{filename}'
+            if path == self.refsPath or filename.endswith('.tmp') or os.path.isdir(path):
+                continue
+            with self.lock:
+                if filename not in self.counts:
+                    candidates.append(filename)
+        if not candidates:
+            return 0, 0
+
+        referenced = self.referencedFiles()
+        removedFiles, removedBytes = 0, 0
+        removedHashes = set()
+        for filename in candidates:
+            path = f'{self.imageFolder}/{filename}'
+            with self.lock:
+                if filename in self.counts or filename in referenced or not os.path.exists(path):
+                    continue
+                removedBytes += os.path.getsize(path)
+                os.remove(path)
+            removedFiles += 1
+            removedHashes.add(filename.split('.', 1)[0])
+
+        if removedHashes and os.path.isdir(self.thumbnailFolder):
+            for filename in os.listdir(self.thumbnailFolder):
+                if filename.split('_', 1)[0] in removedHashes:
+                    path = f'{self.thumbnailFolder}/{filename}'
+                    removedBytes += os.path.getsize(path)
+                    os.remove(path)
+                    removedFiles += 1
+        return removedFiles, removedBytes
+
+    # The image files the word entries themselves refer to
+    def referencedFiles(self):
+        referenced = set()
+        if self.entrySource is None:
+            return referenced
+        for _, data in self.entrySource():
+            if data['imageExists'] and data.get('imageHash'):
+                referenced.add(f'{data["imageHash"]}.{data["fileExtension"]}')
+        return referenced
@@ -1,3 +1,6 @@
+import time
+# Taken before the other imports so --profile-startup can tell how long they take
+importsStarted = time.perf_counter()
 import sys
 from PyQt5 import QtWidgets, QtGui, QtCore
 import os
@@ -5,7 +8,17 @@ import json
 from enum import Enum
 import random
 import word
-import time
+import saver
+import imagestore
+import imageimport
+import thumbnails
+import searchindex
+import searchworker
+import wordlistmodel
+import prefetch
+import textlistview
+import wordloader
+import startupprofile
 
 header_font = QtGui.QFont("OpenSans", 28)
 wordTitle_font = QtGui.QFont("OpenSans", 22)
@@ -16,6 +29,10 @@ inapp_font = QtGui.QFont("OpenSans", 12)
 class Global:
     GAME_PROMPT_KEY = 'prompt_game_howtoplay'
     HIGHSCORE_KEY = 'highscore'
+    STORAGE_BACKEND_KEY = 'storage_backend'
+    LAZY_LOADING_KEY = 'lazy_loading'
+    PREFETCH_BUDGET_KEY = 'prefetch_budget'
+    RANDOM_SHUFFLE_KEY = 'random_shuffle'
 
 class Menu(Enum):
     MAIN_MENU = 1
@@ -24,17 +41,40 @@ class Menu(Enum):
     PLAY_GAME = 4
     SURF_WORDS = 5
 
+# Menus that read or change words, they wait on a loading screen until the words are loaded
+DATA_MENUS = (Menu.ADD_WORD, Menu.SEARCH_WORD, Menu.PLAY_GAME, Menu.SURF_WORDS)
+FULL_TEXT_BUILDING_MESSAGE = 'Indexing definitions and sentences...'
+
 class MainWindow(QtWidgets.QMainWindow):
 
-    def __init__(self):
+    def __init__(self, startupProfile: startupprofile.StartupProfile = None):
         super().__init__()
-        self.wordDataDict = dict()
+        self.startupProfile = startupProfile
+        self.backgroundSaver = saver.BackgroundSaver()
+        self.backgroundSaver.start()
+        self.wordStore = None
+        self.wordIndex = None
+        self.searchWorker = None
+        self.prefetcher = None
+        self.searchMode = searchindex.SearchMode.WORDS
+        self.game_timer = None
+        self.randomWords = None
+        self.menuAfterLoading = None
+        self.loadingScreen = None
+        self.imageStore = imagestore.ImageStore(word.dataFoldername, self.backgroundSaver)
+        self.imageImporter = imageimport.ImageImporter(self.imageStore.incomingFolder)
+        self.imageImporter.progressChanged.connect(self.showImportProgress)
+        self.thumbnailCache = thumbnails.ThumbnailCache(word.dataFoldername)
         self.appdataDict = {
             Global.GAME_PROMPT_KEY: True,
             Global.HIGHSCORE_KEY: 0,
+            Global.STORAGE_BACKEND_KEY: 'json',
+            Global.LAZY_LOADING_KEY: True,
+            Global.PREFETCH_BUDGET_KEY: 4 * 1024 * 1024,
+            Global.RANDOM_SHUFFLE_KEY: True,
         }
-        self.loadWords()
         self.loadAppdata()
+        self.loadWords()
         
         self.mainLayout = QtWidgets.QHBoxLayout()
         self.appVersion = 'v1.7'
@@ -44,21 +84,35 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setGeometry(0, 0, self.windowSize[0], self.windowSize[1])
         self.center()
 
+        # Every menu is built once, the first time it is shown, and kept in the stack.
+        # Switching menus only refills the data of the target menu.
+        self.stack = QtWidgets.QStackedWidget(self)
+        self.setCentralWidget(self.stack)
+        self.screens = dict()
+
         self.menuList = [Menu.MAIN_MENU]
         self.previousMenu = None
         self.currentMenu = Menu.MAIN_MENU
         self.switchMenu(Menu.MAIN_MENU)
 
+        if self.startupProfile is not None:
+            self.startupProfile.mark('main window')
+            self.startupProfile.watchPaint(self.mainMenu_Title)
         self.show()
 
-    def modifyWord(self, word: str):
-        word = word.lower().strip().capitalize()
-        return word
+    def modifyWord(self, wordName: str):
+        return word.modifyWord(wordName)
 
     def switchMenu(self, menu: Menu, wordData: word.Word = None):
 
+        if menu in DATA_MENUS and self.wordStore is None:
+            self.menuAfterLoading = (menu, wordData)
+            self.showLoadingScreen()
+            return
+        self.menuAfterLoading = None
+
         if menu == Menu.PLAY_GAME:
-            if len(self.wordDataDict.keys()) < 4:
+            if len(self.wordStore) < 4:
                 QtWidgets.QMessageBox.critical(self, "Error!", "Please add some more words to Your Dictionary")
                 return
             if self.appdataDict[Global.GAME_PROMPT_KEY]:
@@ -73,9 +127,10 @@ class MainWindow(QtWidgets.QMainWindow):
                 
                 msgBox.exec()
                 self.appdataDict[Global.GAME_PROMPT_KEY] = not cb.isChecked()
+                self.saveAppdata()
                 
         if menu == Menu.SURF_WORDS:
-            if len(self.wordDataDict) == 0:
+            if len(self.wordStore) == 0:
                 QtWidgets.QMessageBox.warning(self, 'Error!', 'You Have to add some words to your dictionary!', QtWidgets.QMessageBox.Ok)
                 return
 
@@ -90,21 +145,33 @@ class MainWindow(QtWidgets.QMainWindow):
             self.previousMenu = None
         self.currentMenu = self.menuList[-1]
 
-        self.central = QtWidgets.QWidget(self)
-        self.setCentralWidget(self.central)
+        if menu != Menu.PLAY_GAME and self.game_timer is not None:
+            self.game_timer.stop()
 
-        if menu == Menu.MAIN_MENU:
-            self.createMainMenu()
-        elif menu == Menu.ADD_WORD:
-            self.createAddWordMenu(wordData)
+        if menu not in self.screens:
+            self.central = QtWidgets.QWidget()
+            if menu == Menu.MAIN_MENU:
+                self.createMainMenu()
+            elif menu == Menu.ADD_WORD:
+                self.createAddWordMenu()
+            elif menu == Menu.SEARCH_WORD:
+                self.createSearchWordMenu()
+            elif menu == Menu.SURF_WORDS:
+                self.createSurfWordsMenu()
+            elif menu == Menu.PLAY_GAME:
+                self.createPlayGameMenu()
+            self.screens[menu] = self.central
+            self.stack.addWidget(self.central)
+
+        if menu == Menu.ADD_WORD:
+            self.fillAddWordMenu(wordData)
         elif menu == Menu.SEARCH_WORD:
-            self.createSearchWordMenu(wordData)
+            self.fillSearchWordMenu(wordData)
         elif menu == Menu.SURF_WORDS:
-            self.createSurfWordsMenu(wordData)
+            self.fillSurfWordsMenu(wordData)
         elif menu == Menu.PLAY_GAME:
-            self.createPlayGameMenu()
-        else:
-            self.central.setLayout(self.mainMenu_HLayout)
+            self.fillPlayGameMenu()
+        self.stack.setCurrentWidget(self.screens[menu])
 
     def createMainMenu(self):
         # region Title
@@ -160,7 +227,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.central.setLayout(self.mainMenu_HLayout)
         # endregion
 
-    def createAddWordMenu(self, preloadedWord:word.Word = None):
+    def createAddWordMenu(self):
         # region Word Typing
         self.addWord_WordLineEdit = QtWidgets.QLineEdit()
         self.addWord_WordLineEdit.setFont(inapp_font)
@@ -175,20 +242,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.addWord_ChooseImageText.setFont(inapp_font)
         self.currentFilename = ""
 
-        def formatFilename(filename):
-            filename.replace('\\', '/')
-            chooseImageStr = filename.split('/')[-1]
-            if len(chooseImageStr) > 20:
-                chooseImageStr = "..." + chooseImageStr[-17:]
-            return chooseImageStr
-
         def chooseImage():
             filename = QtWidgets.QFileDialog.getOpenFileName(self, 'Open file', '',"Image files (*.png *.jpg)")[0]
             if not filename:
                 return
             self.currentFilename = filename
+            # The image is scaled down and re-encoded in the background while the rest of the form is filled in
+            self.imageImporter.submit(filename)
 
-            chooseImageStr = formatFilename(filename)
+            chooseImageStr = self.formatFilename(filename)
             self.addWord_ChooseImageText.setText(chooseImageStr)
 
         self.addWord_ChooseImageButton.clicked.connect(chooseImage)
@@ -202,43 +264,39 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # region Manipulating List Widgets
 
-        def addToListWidget(lWidget, wordName, textBox):
-            word = wordName
-            word = self.modifyWord(word)
-            if not word:
+        def addToList(listModel, wordName, textBox):
+            text = self.modifyWord(wordName)
+            if not text:
                 return
-            for i in range(lWidget.count()):
-                item = lWidget.item(i)
-                if item.text() == word:
-                    return
-            lWidget.addItem(word)
-            textBox.clear()
-
-        def removeFromListWidget(lWidget):
-            item = lWidget.currentItem()
-            if not item:
+            if listModel.addTexts([text]):
+                textBox.clear()
+
+        # Every line of the clipboard becomes a definition or sentence, all of them are inserted at once
+        def pasteToList(listModel):
+            pastedLines = QtWidgets.QApplication.clipboard().text().splitlines()
+            added = listModel.addTexts(map(self.modifyWord, pastedLines))
+            self.statusBar().showMessage(f'Pasted {added} new lines, skipped {len(pastedLines) - added} empty or duplicate ones', 5000)
+
+        def removeFromList(listView):
+            index = listView.currentIndex()
+            if not index.isValid():
                 return
-            lWidget.takeItem(lWidget.row(item))
-
-        def moveSelectedToUp(lWidget):
-            items = lWidget.selectedIndexes()
+            listView.model().removeText(index.row())
 
-            if not items or items[0].row() == 0:
+        def moveSelected(listView, step):
+            indexes = listView.selectedIndexes()
+            if not indexes:
                 return
-            index = items[0].row()
-            item = lWidget.takeItem(index)
-            lWidget.insertItem(index - 1, item)
-            lWidget.setCurrentRow(index - 1)
+            row = indexes[0].row()
+            if listView.model().moveText(row, step):
+                listView.setCurrentIndex(listView.model().index(row + step))
 
-        def moveSelectedToDown(lWidget):
-            items = lWidget.selectedIndexes()
-
-            if not items or items[0].row() == lWidget.count() - 1:
-                return
-            index = items[0].row()
-            item = lWidget.takeItem(index)
-            lWidget.insertItem(index + 1, item)
-            lWidget.setCurrentRow(index + 1)
+        def createTextListView(listModel):
+            listView = QtWidgets.QListView()
+            listView.setFont(inapp_font)
+            listView.setUniformItemSizes(True)
+            listView.setModel(listModel)
+            return listView
 
 
         # endregion
@@ -249,26 +307,30 @@ class MainWindow(QtWidgets.QMainWindow):
         self.addWord_DefinitionsLineEdit.setFont(inapp_font)
         self.addWord_DefinitionsLineEdit.setMaximumWidth(175)
 
-        self.addWord_DefinitionsListWidget = QtWidgets.QListWidget()
-        self.addWord_DefinitionsListWidget.setFont(inapp_font)
+        self.addWord_DefinitionsListModel = wordlistmodel.UniqueTextListModel()
+        self.addWord_DefinitionsListView = createTextListView(self.addWord_DefinitionsListModel)
 
         self.addWord_AddDefButton = QtWidgets.QPushButton("Add")
         self.addWord_AddDefButton.setFont(inapp_font)
         self.addWord_AddDefButton.clicked.connect(
-            lambda: addToListWidget(self.addWord_DefinitionsListWidget, self.addWord_DefinitionsLineEdit.text(), self.addWord_DefinitionsLineEdit)
+            lambda: addToList(self.addWord_DefinitionsListModel, self.addWord_DefinitionsLineEdit.text(), self.addWord_DefinitionsLineEdit)
         )
 
         self.addWord_RemoveDefButton = QtWidgets.QPushButton("Remove")
         self.addWord_RemoveDefButton.setFont(inapp_font)
-        self.addWord_RemoveDefButton.clicked.connect(lambda: removeFromListWidget(self.addWord_DefinitionsListWidget))
+        self.addWord_RemoveDefButton.clicked.connect(lambda: removeFromList(self.addWord_DefinitionsListView))
 
         self.addWord_UpDefButton = QtWidgets.QPushButton("Up")
         self.addWord_UpDefButton.setFont(inapp_font)
-        self.addWord_UpDefButton.clicked.connect(lambda: moveSelectedToUp(self.addWord_DefinitionsListWidget))
+        self.addWord_UpDefButton.clicked.connect(lambda: moveSelected(self.addWord_DefinitionsListView, -1))
 
         self.addWord_DownDefButton = QtWidgets.QPushButton("Down")
         self.addWord_DownDefButton.setFont(inapp_font)
-        self.addWord_DownDefButton.clicked.connect(lambda: moveSelectedToDown(self.addWord_DefinitionsListWidget))
+        self.addWord_DownDefButton.clicked.connect(lambda: moveSelected(self.addWord_DefinitionsListView, 1))
+
+        self.addWord_PasteDefButton = QtWidgets.QPushButton("Paste Lines")
+        self.addWord_PasteDefButton.setFont(inapp_font)
+        self.addWord_PasteDefButton.clicked.connect(lambda: pasteToList(self.addWord_DefinitionsListModel))
 
         # endregion
 
@@ -287,11 +349,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.addWord_DefinitionsVLayout.addWidget(self.addWord_DefinitionsLineEdit)
         self.addWord_DefinitionsVLayout.addLayout(self.addWord_AddRemoveDefHLayout)
         self.addWord_DefinitionsVLayout.addLayout(self.addWord_UpDownDefHLayout)
+        self.addWord_DefinitionsVLayout.addWidget(self.addWord_PasteDefButton)
         self.addWord_DefinitionsVLayout.addStretch()
 
         self.addWord_DefinitionsHLayout = QtWidgets.QHBoxLayout()
         self.addWord_DefinitionsHLayout.addLayout(self.addWord_DefinitionsVLayout)
-        self.addWord_DefinitionsHLayout.addWidget(self.addWord_DefinitionsListWidget)
+        self.addWord_DefinitionsHLayout.addWidget(self.addWord_DefinitionsListView)
         # endregion
 
         # region Add Example Sentences
@@ -302,42 +365,30 @@ class MainWindow(QtWidgets.QMainWindow):
         self.addWord_SentencesTextEdit.setMaximumHeight(80)
         self.addWord_SentencesTextEdit.setMinimumHeight(80)
 
-        self.addWord_SentencesListWidget = QtWidgets.QListWidget()
-        self.addWord_SentencesListWidget.setFont(inapp_font)
+        self.addWord_SentencesListModel = wordlistmodel.UniqueTextListModel()
+        self.addWord_SentencesListView = createTextListView(self.addWord_SentencesListModel)
 
         self.addWord_AddSentencesButton = QtWidgets.QPushButton("Add")
         self.addWord_AddSentencesButton.setFont(inapp_font)
         self.addWord_AddSentencesButton.clicked.connect(
-            lambda: addToListWidget(self.addWord_SentencesListWidget, self.addWord_SentencesTextEdit.toPlainText(), self.addWord_SentencesTextEdit)
+            lambda: addToList(self.addWord_SentencesListModel, self.addWord_SentencesTextEdit.toPlainText(), self.addWord_SentencesTextEdit)
         )
 
         self.addWord_RemoveSentencesButton = QtWidgets.QPushButton("Remove")
         self.addWord_RemoveSentencesButton.setFont(inapp_font)
-        self.addWord_RemoveSentencesButton.clicked.connect(lambda: removeFromListWidget(self.addWord_SentencesListWidget))
+        self.addWord_RemoveSentencesButton.clicked.connect(lambda: removeFromList(self.addWord_SentencesListView))
 
         self.addWord_UpSentenceButton = QtWidgets.QPushButton("Up")
         self.addWord_UpSentenceButton.setFont(inapp_font)
-        self.addWord_UpSentenceButton.clicked.connect(lambda: moveSelectedToUp(self.addWord_SentencesListWidget))
+        self.addWord_UpSentenceButton.clicked.connect(lambda: moveSelected(self.addWord_SentencesListView, -1))
 
         self.addWord_DownSentenceButton = QtWidgets.QPushButton("Down")
         self.addWord_DownSentenceButton.setFont(inapp_font)
-        self.addWord_DownSentenceButton.clicked.connect(lambda: moveSelectedToDown(self.addWord_SentencesListWidget))
+        self.addWord_DownSentenceButton.clicked.connect(lambda: moveSelected(self.addWord_SentencesListView, 1))
 
-        # endregion
-
-        # region Check if has pre loaded word
-        if preloadedWord is not None:
-            self.addWord_WordLineEdit.setText(preloadedWord.word)
-            self.addWord_WordLineEdit.setDisabled(True)
-
-            if preloadedWord.imageExists:
-                self.currentFilename = preloadedWord.imagePath
-                self.addWord_ChooseImageText.setText(formatFilename(self.currentFilename))
-
-            for d in preloadedWord.definitions:
-                self.addWord_DefinitionsListWidget.addItem(QtWidgets.QListWidgetItem(d))
-            for es in preloadedWord.exampleSentences:
-                self.addWord_SentencesListWidget.addItem(QtWidgets.QListWidgetItem(es))
+        self.addWord_PasteSentencesButton = QtWidgets.QPushButton("Paste Lines")
+        self.addWord_PasteSentencesButton.setFont(inapp_font)
+        self.addWord_PasteSentencesButton.clicked.connect(lambda: pasteToList(self.addWord_SentencesListModel))
 
         # endregion
 
@@ -356,11 +407,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.addWord_SentencesVLayout.addWidget(self.addWord_SentencesTextEdit)
         self.addWord_SentencesVLayout.addLayout(self.addWord_AddRemoveSentencesHLayout)
         self.addWord_SentencesVLayout.addLayout(self.addWord_UpDownSentencesHLayout)
+        self.addWord_SentencesVLayout.addWidget(self.addWord_PasteSentencesButton)
         self.addWord_SentencesVLayout.addStretch()
 
         self.addWord_SentencesHLayout = QtWidgets.QHBoxLayout()
         self.addWord_SentencesHLayout.addLayout(self.addWord_SentencesVLayout)
-        self.addWord_SentencesHLayout.addWidget(self.addWord_SentencesListWidget)
+        self.addWord_SentencesHLayout.addWidget(self.addWord_SentencesListView)
         # endregion
 
         # region Back and Save Buttons
@@ -369,30 +421,24 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.addWord_BackButton = QtWidgets.QPushButton("Back")
         self.addWord_BackButton.setFont(inapp_font)
-        self.addWord_BackButton.clicked.connect(lambda: self.switchMenu(self.previousMenu, preloadedWord))
+        self.addWord_BackButton.clicked.connect(lambda: self.switchMenu(self.previousMenu, self.addWord_PreloadedWord))
 
         def addWord():
+            preloadedWord = self.addWord_PreloadedWord
             wordName = self.addWord_WordLineEdit.text()
             wordName = self.modifyWord(wordName)
             if not wordName:
                 QtWidgets.QMessageBox.warning(self, 'Error', "You have to specify a word name!")
                 return
 
-            if self.addWord_DefinitionsListWidget.count() == 0:
+            if len(self.addWord_DefinitionsListModel) == 0:
                 QtWidgets.QMessageBox.warning(self, 'Error', "You have to specify at least one definition!")
                 return
 
-            definitionsList = []
-            for i in range(self.addWord_DefinitionsListWidget.count()):
-                item = self.addWord_DefinitionsListWidget.item(i)
-                definitionsList.append(item.text())
-
-            sentenceList = []
-            for i in range(self.addWord_SentencesListWidget.count()):
-                item = self.addWord_SentencesListWidget.item(i)
-                sentenceList.append(item.text())
+            definitionsList = list(self.addWord_DefinitionsListModel.texts)
+            sentenceList = list(self.addWord_SentencesListModel.texts)
 
-            if wordName in self.wordDataDict.keys():
+            if wordName in self.wordStore:
                 if preloadedWord is None:
                     mbox = QtWidgets.QMessageBox.question(self, 'Are you sure?', f'This word already exists. Do you want to update it?', QtWidgets.QMessageBox.No | QtWidgets.QMessageBox.Yes)
                     if mbox == QtWidgets.QMessageBox.No:
@@ -402,10 +448,18 @@ class MainWindow(QtWidgets.QMainWindow):
             else:
                 QtWidgets.QMessageBox.information(self, 'Added a word!', f'You successfully added {wordName} to your dictionary!')
 
-            w = word.Word(wordName, self.currentFilename, definitionsList, sentenceList)
-            self.wordDataDict[wordName] = w.getAsDictionary()
+            importJob = self.imageImporter.jobFor(self.currentFilename)
+            if importJob is None:
+                w = word.Word(wordName, self.currentFilename, definitionsList, sentenceList, self.imageStore)
+            else:
+                w = word.Word(wordName, '', definitionsList, sentenceList, self.imageStore)
+            self.wordStore.put(wordName, w.getAsDictionary())
+            self.prefetcher.invalidate(wordName)
+            self.wordIndex.add(wordName, w.getAsDictionary())
+            self.randomWords.add(wordName)
+            if importJob is not None:
+                importJob.whenDone(lambda job: self.attachImportedImage(wordName, job))
 
-            self.saveWordData()
             if preloadedWord is None:
                 self.switchMenu(self.currentMenu)
             else:
@@ -443,83 +497,118 @@ class MainWindow(QtWidgets.QMainWindow):
         self.central.setLayout(self.addWord_HLayout)
         # endregion
 
-    def createSearchWordMenu(self, selectedWord:word.Word = None):
-        # region Line Edit and List Widget
-        def updateListWidget(word: str):
-            self.searchWord_ListWidget.clear()
+    def formatFilename(self, filename):
+        filename.replace('\\', '/')
+        chooseImageStr = filename.split('/')[-1]
+        if len(chooseImageStr) > 20:
+            chooseImageStr = "..." + chooseImageStr[-17:]
+        return chooseImageStr
+
+    # Resets the form, or loads preloadedWord into it to edit that word
+    def fillAddWordMenu(self, preloadedWord:word.Word = None):
+        self.addWord_PreloadedWord = preloadedWord
+        self.currentFilename = ""
+        self.addWord_WordLineEdit.clear()
+        self.addWord_WordLineEdit.setDisabled(False)
+        self.addWord_ChooseImageText.setText("Choose Image...")
+        self.addWord_DefinitionsLineEdit.clear()
+        self.addWord_SentencesTextEdit.clear()
+
+        if preloadedWord is not None:
+            self.addWord_WordLineEdit.setText(preloadedWord.word)
+            self.addWord_WordLineEdit.setDisabled(True)
 
-            searched = self.modifyWord(word)
-            searched = searched.lower()
+            if preloadedWord.imageExists:
+                self.currentFilename = preloadedWord.imagePath
+                self.addWord_ChooseImageText.setText(self.formatFilename(self.currentFilename))
 
-            matchedWordsStartsWith = []
-            matchedWordsIncludes = []
+        self.addWord_DefinitionsListModel.setTexts(preloadedWord.definitions if preloadedWord is not None else [])
+        self.addWord_SentencesListModel.setTexts(preloadedWord.exampleSentences if preloadedWord is not None else [])
 
-            for w in self.wordDataDict.keys():
-                if w.lower().startswith(searched):
-                    matchedWordsStartsWith.append(w)
-                elif searched in w.lower():
-                    matchedWordsIncludes.append(w)
+    def createSearchWordMenu(self):
+        # region Line Edit and List Widget
+        def updateResultList(matchedWords: list, latency: float = None, similar: bool = False):
+            self.searchWord_ListModel.setWords(matchedWords)
 
-            matchedWordsStartsWith = sorted(matchedWordsStartsWith)
-            matchedWordsIncludes = sorted(matchedWordsIncludes)
-            matchedWords = matchedWordsStartsWith + matchedWordsIncludes
+            if similar:
+                infoText = f"No matches, listing {len(matchedWords)} similar words"
+            else:
+                infoText = f"Listing {len(matchedWords)} of {len(self.wordStore)} words"
+            if latency is not None:
+                infoText += f" ({latency * 1000:.0f} ms)"
+            self.wordInfo_Label.setText(infoText)
 
-            for w in matchedWords:
-                self.searchWord_ListWidget.addItem(QtWidgets.QListWidgetItem(w))
-            
-            self.wordInfo_Label.setText(f"Listing {len(matchedWords)} of {len(self.wordDataDict)} words")
+        self.searchWord_UpdateResultList = updateResultList
 
         self.searchWord_LineEdit = QtWidgets.QLineEdit()
         self.searchWord_LineEdit.setPlaceholderText("Search Words...")
         self.searchWord_LineEdit.setFont(inapp_font)
         self.searchWord_LineEdit.setMinimumWidth(400)
-        self.searchWord_LineEdit.textChanged.connect(lambda: updateListWidget(self.searchWord_LineEdit.text()))
-
-        self.searchWord_ListWidget = QtWidgets.QListWidget()
-        self.searchWord_ListWidget.setFont(inapp_font)
-        self.searchWord_ListWidget.setMinimumHeight(400)
+        self.searchWord_LineEdit.textChanged.connect(lambda: self.requestSearch())
+
+        def changeSearchMode(index: int):
+            self.searchMode = self.searchWord_ModeComboBox.itemData(index)
+            self.requestSearch(immediate=True)
+
+        self.searchWord_ModeComboBox = QtWidgets.QComboBox()
+        self.searchWord_ModeComboBox.setFont(inapp_font)
+        self.searchWord_ModeComboBox.addItem("Words", searchindex.SearchMode.WORDS)
+        self.searchWord_ModeComboBox.addItem("Definitions and sentences", searchindex.SearchMode.TEXT)
+        self.searchWord_ModeComboBox.setCurrentIndex(self.searchWord_ModeComboBox.findData(self.searchMode))
+        self.searchWord_ModeComboBox.currentIndexChanged.connect(changeSearchMode)
+
+        self.searchWord_SearchHLayout = QtWidgets.QHBoxLayout()
+        self.searchWord_SearchHLayout.addWidget(self.searchWord_LineEdit)
+        self.searchWord_SearchHLayout.addWidget(self.searchWord_ModeComboBox)
+
+        self.searchWord_ListModel = wordlistmodel.WordListModel(parent=self.central)
+        self.searchWord_ListView = QtWidgets.QListView()
+        self.searchWord_ListView.setFont(inapp_font)
+        self.searchWord_ListView.setMinimumHeight(400)
+        self.searchWord_ListView.setUniformItemSizes(True)
+        self.searchWord_ListView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.searchWord_ListView.setModel(self.searchWord_ListModel)
         
-        self.wordInfo_Label = QtWidgets.QLabel(f"Listing {len(self.wordDataDict)} of {len(self.wordDataDict)} words")
+        self.wordInfo_Label = QtWidgets.QLabel(f"Listing {len(self.wordStore)} of {len(self.wordStore)} words")
         self.wordInfo_Label.setFont(inapp_font)
 
-        updateListWidget('')
-        if selectedWord is not None:
-            self.searchWord_ListWidget.setCurrentItem(self.searchWord_ListWidget.findItems(selectedWord.word, QtCore.Qt.MatchExactly)[0])
-
         # endregion
 
         # region Back, Edit and Open buttons and layouts
 
+        def selectedWordName():
+            selectedIndexes = self.searchWord_ListView.selectionModel().selectedIndexes()
+            if not selectedIndexes:
+                return None
+            return self.searchWord_ListModel.wordAt(selectedIndexes[0].row())
+
         def editSelected():
-            selectedItem = self.searchWord_ListWidget.selectedItems()
-            if not selectedItem:
+            selectedWordStr = selectedWordName()
+            if selectedWordStr is None:
                 return
-            selectedWordStr = selectedItem[0].text()
             selectedWord = word.Word()
-            selectedWord.loadFromDict(selectedWordStr, self.wordDataDict[selectedWordStr])
+            selectedWord.loadFromDict(selectedWordStr, self.wordStore.get(selectedWordStr))
 
             self.switchMenu(Menu.ADD_WORD, selectedWord)
 
         def openSelected():
-            selectedItem = self.searchWord_ListWidget.selectedItems()
-            if not selectedItem:
+            selectedWordStr = selectedWordName()
+            if selectedWordStr is None:
                 return
-            selectedWordStr = selectedItem[0].text()
             selectedWord = word.Word()
-            selectedWord.loadFromDict(selectedWordStr, self.wordDataDict[selectedWordStr])
+            selectedWord.loadFromDict(selectedWordStr, self.wordStore.get(selectedWordStr))
 
             self.switchMenu(Menu.SURF_WORDS, selectedWord)
 
         def removeSelected():
-            selectedItem = self.searchWord_ListWidget.selectedItems()
-            if not selectedItem:
+            selectedWordStr = selectedWordName()
+            if selectedWordStr is None:
                 return
-            selectedWordStr = selectedItem[0].text()
 
             reply = QtWidgets.QMessageBox.question(self, "Are you sure?", f"Do you really Want to remove {selectedWordStr} from your dictionary?",
                                                  QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
             if reply == QtWidgets.QMessageBox.Yes:
-                self.wordDataDict.pop(selectedWordStr)
+                self.removeWord(selectedWordStr)
                 self.switchMenu(Menu.SEARCH_WORD)
 
 
@@ -554,8 +643,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.searchWord_MainVLayout = QtWidgets.QVBoxLayout()
 
         self.searchWord_MainVLayout.addStretch()
-        self.searchWord_MainVLayout.addWidget(self.searchWord_LineEdit)
-        self.searchWord_MainVLayout.addWidget(self.searchWord_ListWidget)
+        self.searchWord_MainVLayout.addLayout(self.searchWord_SearchHLayout)
+        self.searchWord_MainVLayout.addWidget(self.searchWord_ListView)
         self.searchWord_MainVLayout.addWidget(self.wordInfo_Label)
         self.searchWord_MainVLayout.addStretch()
         self.searchWord_MainVLayout.addLayout(self.searchWord_ButtonHLayout)
@@ -570,51 +659,31 @@ class MainWindow(QtWidgets.QMainWindow):
         self.central.setLayout(self.searchWord_MainHLayout)
         # endregion
 
-    def createSurfWordsMenu(self, currentWord:word.Word = None):
+    # Lists every word again, with selectedWord selected
+    def fillSearchWordMenu(self, selectedWord:word.Word = None):
+        self.searchWord_LineEdit.blockSignals(True)
+        self.searchWord_LineEdit.clear()
+        self.searchWord_LineEdit.blockSignals(False)
 
-        keys_list = sorted(list(self.wordDataDict.keys()))
+        matchedWordsStartsWith, matchedWordsIncludes, _ = self.wordIndex.search('')
+        self.searchWord_UpdateResultList(matchedWordsStartsWith + matchedWordsIncludes)
+        if selectedWord is not None:
+            selectedIndex = self.searchWord_ListModel.indexOf(selectedWord.word)
+            if selectedIndex.isValid():
+                self.searchWord_ListView.setCurrentIndex(selectedIndex)
+                self.searchWord_ListView.scrollTo(selectedIndex)
 
-        # region Initialize
-        if currentWord is None:
-            currentWord = word.Word()
-            randomWord = keys_list[0]
-            currentWord.loadFromDict(randomWord, self.wordDataDict[randomWord])
-
-        index = 0
-        for i in range(len(keys_list)):
-            if keys_list[i] == currentWord.word:
-                index = i
-        # endregion
+    def createSurfWordsMenu(self):
 
         # region Image and Title
-        self.surfWords_ImageLabel = None
-
-        if currentWord.imageExists:
-            self.surfWords_ImageLabel = QtWidgets.QLabel()
-            pixmap = QtGui.QPixmap(currentWord.imagePath)
-            ratio = pixmap.width() / pixmap.height()
-            max_wh = 128
-
-            new_width, new_height = 0, 0
-            if ratio > 1:
-                new_width = max_wh
-                new_height = int(max_wh / ratio)
-            else:
-                new_width = int(max_wh * ratio)
-                new_height = max_wh
-
-            pixmap = pixmap.scaledToWidth(new_width, QtCore.Qt.SmoothTransformation)
-            pixmap = pixmap.scaledToHeight(new_height, QtCore.Qt.SmoothTransformation)
+        self.surfWords_ImageLabel = QtWidgets.QLabel()
 
-            self.surfWords_ImageLabel.setPixmap(pixmap)
-
-        self.surfWords_TitleLabel = QtWidgets.QLabel(currentWord.word)
+        self.surfWords_TitleLabel = QtWidgets.QLabel()
         self.surfWords_TitleLabel.setFont(wordTitle_font)
 
         self.surfWords_TitleHLayout = QtWidgets.QHBoxLayout()
         self.surfWords_TitleHLayout.addStretch()
-        if self.surfWords_ImageLabel is not None:
-            self.surfWords_TitleHLayout.addWidget(self.surfWords_ImageLabel)
+        self.surfWords_TitleHLayout.addWidget(self.surfWords_ImageLabel)
         self.surfWords_TitleHLayout.addWidget(self.surfWords_TitleLabel)
         self.surfWords_TitleHLayout.addStretch()
         # endregion
@@ -624,24 +693,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.surfWords_DefinitionsLabel.setStyleSheet("color: #5c5a5a")
         self.surfWords_DefinitionsLabel.setFont(text_font)
 
-        self.surfWords_DefinitionsScrollArea = QtWidgets.QScrollArea()
-        self.surfWords_DefinitionsScrollArea.setMaximumHeight(200)
-        self.surfWords_DefinitionsScrollArea.setMinimumWidth(500)
-        self.surfWords_DefinitionsCenteral = QtWidgets.QWidget()
-        self.surfWords_DefinitionsScrollAreaVLayout = QtWidgets.QVBoxLayout()
-
-        for i, d in enumerate(currentWord.definitions):
-            lbl = QtWidgets.QLabel(f'{i + 1}. {d}')
-            lbl.setFont(text_font)
-            lbl.setWordWrap(True)
-            self.surfWords_DefinitionsScrollAreaVLayout.addWidget(lbl)
-
-        self.surfWords_DefinitionsCenteral.setLayout(self.surfWords_DefinitionsScrollAreaVLayout)
-        self.surfWords_DefinitionsScrollArea.setWidget(self.surfWords_DefinitionsCenteral)
+        self.surfWords_DefinitionsListView = textlistview.NumberedTextView(text_font)
+        self.surfWords_DefinitionsListView.setMaximumHeight(200)
+        self.surfWords_DefinitionsListView.setMinimumWidth(500)
 
         self.surfWords_DefinitionsVLayout = QtWidgets.QVBoxLayout()
         self.surfWords_DefinitionsVLayout.addWidget(self.surfWords_DefinitionsLabel)
-        self.surfWords_DefinitionsVLayout.addWidget(self.surfWords_DefinitionsScrollArea)
+        self.surfWords_DefinitionsVLayout.addWidget(self.surfWords_DefinitionsListView)
 
         # endregion
 
@@ -650,29 +708,19 @@ class MainWindow(QtWidgets.QMainWindow):
         self.surfWords_SentencesLabel.setStyleSheet("color: #5c5a5a")
         self.surfWords_SentencesLabel.setFont(text_font)
 
-        self.surfWords_SentencesScrollArea = QtWidgets.QScrollArea()
-        self.surfWords_SentencesScrollArea.setMaximumHeight(150)
-        self.surfWords_SentencesScrollArea.setMinimumWidth(500)
-
-        self.surfWords_SentencesCenteral = QtWidgets.QWidget()
-        self.surfWords_SentencesScrollAreaVLayout = QtWidgets.QVBoxLayout()
-
-
-        for i, es in enumerate(currentWord.exampleSentences):
-            lbl = QtWidgets.QLabel(f'{i + 1}. {es}')
-            lbl.setFont(text_font)
-            lbl.setWordWrap(True)
-            self.surfWords_SentencesScrollAreaVLayout.addWidget(lbl)
-
-        self.surfWords_SentencesCenteral.setLayout(self.surfWords_SentencesScrollAreaVLayout)
-        self.surfWords_SentencesScrollArea.setWidget(self.surfWords_SentencesCenteral)
+        self.surfWords_SentencesListView = textlistview.NumberedTextView(text_font)
+        self.surfWords_SentencesListView.setMaximumHeight(150)
+        self.surfWords_SentencesListView.setMinimumWidth(500)
 
-        self.surfWords_SentencesVLayout = QtWidgets.QVBoxLayout()
+        # Shown instead of emptyObject when the word has example sentences
+        self.surfWords_SentencesWidget = QtWidgets.QWidget()
+        self.surfWords_SentencesVLayout = QtWidgets.QVBoxLayout(self.surfWords_SentencesWidget)
+        self.surfWords_SentencesVLayout.setContentsMargins(0, 0, 0, 0)
         self.surfWords_SentencesVLayout.addWidget(self.surfWords_SentencesLabel)
-        self.surfWords_SentencesVLayout.addWidget(self.surfWords_SentencesScrollArea)
+        self.surfWords_SentencesVLayout.addWidget(self.surfWords_SentencesListView)
 
         self.emptyObject = QtWidgets.QWidget()
-        self.emptyObject.setMinimumHeight(self.surfWords_SentencesScrollArea.height())
+        self.emptyObject.setMinimumHeight(self.surfWords_SentencesListView.height())
         self.emptyObject.setMaximumHeight(150)
         self.emptyObject.setMinimumWidth(500)
 
@@ -680,33 +728,27 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # region Buttons
 
-        def changeWord(index, step):
-            index += step
-            if index < 0:
-                index = len(keys_list) - 1
-            elif index > len(keys_list) - 1:
-                index = 0
-            currentStr = keys_list[index]
-            currentWord.loadFromDict(currentStr, self.wordDataDict[currentStr])
+        def changeWord(step):
+            currentWord = self.surfWords_CurrentWord
+            currentStr = self.wordIndex.neighbour(currentWord.word, step)
+            currentWord.loadFromDict(currentStr, self.getEntry(currentStr))
             self.switchMenu(Menu.SURF_WORDS, currentWord)
 
         def getRandomWord():
             new_word = word.Word()
-            if len(keys_list) <= 1:
+            randomWord = self.randomWords.draw(self.surfWords_CurrentWord.word)
+            if randomWord is None:
                 return
-            randomWord = random.choice(keys_list)
-            while randomWord == currentWord.word:
-                randomWord = random.choice(keys_list)
-            new_word.loadFromDict(randomWord, self.wordDataDict[randomWord])
+            new_word.loadFromDict(randomWord, self.getEntry(randomWord))
             self.switchMenu(self.currentMenu, new_word)
 
         def removeSelected():
-            selectedWordStr = currentWord.word
+            selectedWordStr = self.surfWords_CurrentWord.word
 
             reply = QtWidgets.QMessageBox.question(self, "Are you sure?", f"Do you really Want to remove {selectedWordStr} from your dictionary?",
                                                  QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
             if reply == QtWidgets.QMessageBox.Yes:
-                self.wordDataDict.pop(selectedWordStr)
+                self.removeWord(selectedWordStr)
                 self.switchMenu(self.previousMenu)
 
         button_width = 120
@@ -714,17 +756,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.surfWords_PreviousButton = QtWidgets.QPushButton("<< Previous")
         self.surfWords_PreviousButton.setFont(inapp_font)
         self.surfWords_PreviousButton.setMinimumWidth(button_width)
-        self.surfWords_PreviousButton.clicked.connect(lambda: changeWord(index, -1))
+        self.surfWords_PreviousButton.clicked.connect(lambda: changeWord(-1))
 
         self.surfWords_NextButton = QtWidgets.QPushButton("Next >>")
         self.surfWords_NextButton.setFont(inapp_font)
         self.surfWords_NextButton.setMinimumWidth(button_width)
-        self.surfWords_NextButton.clicked.connect(lambda: changeWord(index, 1))
+        self.surfWords_NextButton.clicked.connect(lambda: changeWord(1))
 
         self.surfWords_BackButton = QtWidgets.QPushButton("Back")
         self.surfWords_BackButton.setFont(inapp_font)
         self.surfWords_BackButton.setMinimumWidth(button_width)
-        self.surfWords_BackButton.clicked.connect(lambda: self.switchMenu(self.previousMenu, currentWord))
+        self.surfWords_BackButton.clicked.connect(lambda: self.switchMenu(self.previousMenu, self.surfWords_CurrentWord))
 
         self.surfWords_GetRandomButton = QtWidgets.QPushButton("Random")
         self.surfWords_GetRandomButton.setFont(inapp_font)
@@ -738,7 +780,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.surfWords_EditButton = QtWidgets.QPushButton("Edit")
         self.surfWords_EditButton.setFont(inapp_font)
         self.surfWords_EditButton.setMinimumWidth(button_width)
-        self.surfWords_EditButton.clicked.connect(lambda: self.switchMenu(Menu.ADD_WORD, currentWord))
+        self.surfWords_EditButton.clicked.connect(lambda: self.switchMenu(Menu.ADD_WORD, self.surfWords_CurrentWord))
 
         self.surfWords_RemoveButton = QtWidgets.QPushButton("Remove")
         self.surfWords_RemoveButton.setFont(inapp_font)
@@ -769,12 +811,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.surfWords_MainVLayout.addLayout(self.surfWords_TitleHLayout)
         self.surfWords_MainVLayout.addStretch()
         self.surfWords_MainVLayout.addLayout(self.surfWords_DefinitionsVLayout)
-        if len(currentWord.exampleSentences) != 0:
-            self.surfWords_MainVLayout.addStretch()
-            self.surfWords_MainVLayout.addLayout(self.surfWords_SentencesVLayout)
-        else:
-            self.surfWords_MainVLayout.addStretch()
-            self.surfWords_MainVLayout.addWidget(self.emptyObject)
+        self.surfWords_MainVLayout.addStretch()
+        self.surfWords_MainVLayout.addWidget(self.surfWords_SentencesWidget)
+        self.surfWords_MainVLayout.addWidget(self.emptyObject)
         self.surfWords_MainVLayout.addStretch()
         self.surfWords_MainVLayout.addLayout(self.surfWords_ButtonHLayout)
         self.surfWords_MainVLayout.addStretch()
@@ -787,22 +826,47 @@ class MainWindow(QtWidgets.QMainWindow):
         self.central.setLayout(self.surfWords_MainHLayout)
         # endregion
 
+    # Shows currentWord, or the first word in alphabetical order
+    def fillSurfWordsMenu(self, currentWord:word.Word = None):
+        if currentWord is None:
+            currentWord = word.Word()
+            firstWord = self.wordIndex.wordAt(0)
+            currentWord.loadFromDict(firstWord, self.getEntry(firstWord))
+        self.surfWords_CurrentWord = currentWord
+
+        if currentWord.imageExists and os.path.exists(currentWord.imagePath):
+            thumbnail = self.thumbnailCache.get(currentWord.imagePath, currentWord.imageHash, thumbnails.thumbnailSize)
+            self.surfWords_ImageLabel.setPixmap(QtGui.QPixmap.fromImage(thumbnail))
+            self.surfWords_ImageLabel.show()
+        else:
+            self.surfWords_ImageLabel.clear()
+            self.surfWords_ImageLabel.hide()
+        self.surfWords_TitleLabel.setText(currentWord.word)
+
+        self.surfWords_DefinitionsListView.setTexts(currentWord.definitions)
+        self.surfWords_SentencesListView.setTexts(currentWord.exampleSentences)
+        self.surfWords_SentencesWidget.setVisible(len(currentWord.exampleSentences) != 0)
+        self.emptyObject.setVisible(len(currentWord.exampleSentences) == 0)
+
+        # The next random word is picked now, so it can be warmed together with the neighbours
+        nextRandomWord = self.randomWords.peek(currentWord.word)
+        prefetchWords = prefetch.neighbourhood(self.wordIndex, currentWord.word)
+        if nextRandomWord is not None and nextRandomWord not in prefetchWords:
+            prefetchWords.insert(2, nextRandomWord)
+        self.prefetcher.request(prefetchWords)
+
     def createPlayGameMenu(self):
-        all_keys = list(self.wordDataDict.keys())
-        shuffled_keys = list(self.wordDataDict.keys())
-        random.shuffle(shuffled_keys)
-        self.score = 0
-        
         def update_timer():
+            if self.currentMenu != Menu.PLAY_GAME:
+                return
             try:
                 self.time_elapsed += 1
                 self.timer_Label.setText(f"Timer: {60 - self.time_elapsed}")
                 if self.time_elapsed >= 60:
                     self.game_timer.stop()
-                    self.game_timer.disconnect()
-                    word_count = len(self.wordDataDict.keys())
+                    word_count = len(self.wordStore)
                     msgbox_msg = ""
-                    if len(shuffled_keys) == 0:
+                    if len(self.playGame_ShuffledKeys) == 0:
                         msgbox_msg += "There are no more words left!\n"
                     msgbox_msg += f"Score: {self.score}\nFinal Score: {self.score}*{word_count}={self.score * word_count}\n"
                     self.score *= word_count
@@ -810,6 +874,7 @@ class MainWindow(QtWidgets.QMainWindow):
                     if self.score > highscore:
                         msgbox_msg += "Congrats! This is your new highscore!"
                         self.appdataDict[Global.HIGHSCORE_KEY] = self.score
+                        self.saveAppdata()
                     else:
                         msgbox_msg += f"Highscore: {highscore}"
                     
@@ -821,8 +886,6 @@ class MainWindow(QtWidgets.QMainWindow):
         self.game_timer = QtCore.QTimer()
         self.game_timer.setInterval(1000)
         self.game_timer.timeout.connect(update_timer)
-        self.game_timer.start()
-        self.time_elapsed = 0
         
         def clear_correct_incorrect_label():
             try:
@@ -850,6 +913,8 @@ class MainWindow(QtWidgets.QMainWindow):
             self.buttons[3].setStyleSheet("QPushButton:disabled { color: white; background-color: blue;}")
             
             def erase_colors():
+                if self.currentMenu != Menu.PLAY_GAME:
+                    return
                 try:
                     self.game_timer.start()
                     for button in self.buttons:
@@ -866,6 +931,7 @@ class MainWindow(QtWidgets.QMainWindow):
         
         def reload_playgame():
             # Choose words
+            shuffled_keys = self.playGame_ShuffledKeys
             if not shuffled_keys:
                 self.time_elapsed = 59
                 self.game_timer.stop()
@@ -875,13 +941,13 @@ class MainWindow(QtWidgets.QMainWindow):
             current_word = shuffled_keys[0]
             del shuffled_keys[0]
             
-            definitions = self.wordDataDict[current_word]['definitions']
+            definitions = self.wordStore.get(current_word)['definitions']
             incorrect_words = []
             while True:
-                incorrect_words = random.sample(all_keys, 3)
+                incorrect_words = random.sample(self.playGame_AllKeys, 3)
                 all_ok = True
                 for word in incorrect_words:
-                    for word_def in self.wordDataDict[word]['definitions']:
+                    for word_def in self.wordStore.get(word)['definitions']:
                         if word_def in definitions:
                             all_ok = False
                             break
@@ -900,9 +966,9 @@ class MainWindow(QtWidgets.QMainWindow):
             except:
                 pass
             for i, inc_word in enumerate(incorrect_words):
-                self.buttons[i].setText(random.choice(self.wordDataDict[inc_word]['definitions']))
+                self.buttons[i].setText(random.choice(self.wordStore.get(inc_word)['definitions']))
                 self.buttons[i].clicked.connect(chose_wrong_answer)
-            self.buttons[3].setText(random.choice(self.wordDataDict[current_word]['definitions']))
+            self.buttons[3].setText(random.choice(self.wordStore.get(current_word)['definitions']))
             self.buttons[3].clicked.connect(chose_correct_answer)
             
             self.bottom_question_label.setText(f"of the word \"<font color=\"red\">{current_word}</font>\"?")
@@ -1009,29 +1075,157 @@ class MainWindow(QtWidgets.QMainWindow):
         self.playGame_MainHLayout.addStretch()
         self.central.setLayout(self.playGame_MainHLayout)
         # endregion
-        
-        reload_playgame()
+
+        self.playGame_Reload = reload_playgame
+
+    # Starts a new game
+    def fillPlayGameMenu(self):
+        self.playGame_AllKeys = list(self.wordStore.keys())
+        self.playGame_ShuffledKeys = list(self.playGame_AllKeys)
+        random.shuffle(self.playGame_ShuffledKeys)
+        self.score = 0
+        self.time_elapsed = 0
+        self.score_Label.setText("Score: 0")
+        self.timer_Label.setText("Timer: 60")
+        self.correct_incorrect_Label.setText("")
+        for button in (self.choiceA_button, self.choiceB_button, self.choiceC_button, self.choiceD_button):
+            button.setStyleSheet("")
+            button.setEnabled(True)
+        self.game_timer.start()
+        self.playGame_Reload()
     
+    # The words are loaded on the WordLoader thread, onWordsLoaded takes them over once they are ready
     def loadWords(self):
-        if not os.path.exists(word.dataFoldername):
-            os.mkdir(word.dataFoldername)
-        if not os.path.exists(f"{word.dataFoldername}/words.json"):
-            f = open(f"{word.dataFoldername}/words.json", "w")
-            f.write("{}")
-            f.close()
-        with open(f"{word.dataFoldername}/words.json") as f:
-            self.wordDataDict = json.load(f)
+        backend = self.appdataDict[Global.STORAGE_BACKEND_KEY]
+        lazy = self.appdataDict[Global.LAZY_LOADING_KEY]
+        self.wordLoader = wordloader.WordLoader(word.dataFoldername, backend, self.backgroundSaver, lazy, self.imageStore, self.appdataDict[Global.RANDOM_SHUFFLE_KEY])
+        self.wordLoader.loaded.connect(self.onWordsLoaded)
+        self.wordLoader.failed.connect(self.onWordsFailed)
+        self.wordLoader.fullTextBuilt.connect(self.onFullTextBuilt)
+        self.wordLoader.start()
+        self.statusBar().showMessage('Loading words...')
+
+    def onWordsLoaded(self):
+        self.wordStore = self.wordLoader.wordStore
+        self.wordIndex = self.wordLoader.wordIndex
+        self.randomWords = self.wordLoader.randomWords
+        self.searchWorker = searchworker.SearchWorker(self.wordIndex)
+        self.searchWorker.resultsReady.connect(self.applySearchResults)
+        self.prefetcher = prefetch.Prefetcher(self.wordStore, self.thumbnailCache, self.appdataDict[Global.PREFETCH_BUDGET_KEY])
+        self.imageStore.scheduleGarbageCollection()
+        self.statusBar().clearMessage()
+        if self.startupProfile is not None:
+            self.startupProfile.wordsLoaded(self.wordLoader.timings)
+
+        if self.menuAfterLoading is not None:
+            self.switchMenu(*self.menuAfterLoading)
+            # The menu can still refuse to open, like Surf Words on an empty dictionary, then the menu from before comes back
+            if self.stack.currentWidget() is self.loadingScreen:
+                self.stack.setCurrentWidget(self.screens[self.currentMenu])
+
+    def onFullTextBuilt(self):
+        if self.statusBar().currentMessage() == FULL_TEXT_BUILDING_MESSAGE:
+            self.statusBar().clearMessage()
+
+    def onWordsFailed(self, error: str):
+        self.statusBar().clearMessage()
+        if self.loadingScreen is not None:
+            self.loading_Label.setText('Could not load your dictionary')
+        QtWidgets.QMessageBox.critical(self, 'Error!', f'Could not load your dictionary: {error}')
+
+    # Blocks until the words are loaded and taken over, for scripts that drive the window
+    def waitForWords(self):
+        self.wordLoader.wait()
+        QtWidgets.QApplication.processEvents()
+
+    # Shown instead of a menu that needs the words while they are still loading, the menu opens once they are ready
+    def showLoadingScreen(self):
+        if self.loadingScreen is None:
+            self.loading_Label = QtWidgets.QLabel('Loading your dictionary...')
+            self.loading_Label.setFont(text_font)
+            self.loading_Label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+            if self.wordLoader.error is not None:
+                self.loading_Label.setText('Could not load your dictionary')
+
+            self.loading_BackButton = QtWidgets.QPushButton('Back')
+            self.loading_BackButton.setFont(button_font)
+            self.loading_BackButton.clicked.connect(lambda: self.switchMenu(self.currentMenu))
+
+            self.loading_VLayout = QtWidgets.QVBoxLayout()
+            self.loading_VLayout.addStretch()
+            self.loading_VLayout.addWidget(self.loading_Label)
+            self.loading_VLayout.addStretch()
+            self.loading_VLayout.addWidget(self.loading_BackButton, alignment=QtCore.Qt.AlignmentFlag.AlignCenter)
+
+            self.loadingScreen = QtWidgets.QWidget()
+            self.loadingScreen.setLayout(self.loading_VLayout)
+            self.stack.addWidget(self.loadingScreen)
+        self.stack.setCurrentWidget(self.loadingScreen)
 
     def loadAppdata(self):
         if not os.path.exists(word.dataFoldername):
             os.mkdir(word.dataFoldername)
         if not os.path.exists(f"{word.dataFoldername}/appdata.json"):
-            f = open(f"{word.dataFoldername}/appdata.json", "w")
-            json.dump(self.appdataDict, f)
-            f.close()
+            saver.atomicWrite(f"{word.dataFoldername}/appdata.json", json.dumps(self.appdataDict))
         with open(f"{word.dataFoldername}/appdata.json") as f:
-            self.appdataDict = json.load(f)
+            self.appdataDict.update(json.load(f))
     
+    # Called once the import pipeline has normalized the image chosen for wordName
+    def attachImportedImage(self, wordName: str, job: imageimport.ImportJob):
+        if job.error is not None:
+            self.imageImporter.release(job)
+            self.statusBar().showMessage(f'Could not import the image of {wordName}: {job.error}', 5000)
+            return
+        if wordName not in self.wordStore:
+            self.imageImporter.release(job)
+            return
+
+        data = self.wordStore.get(wordName)
+        self.imageStore.adopt(wordName, job.outputPath, job.imageHash, job.fileExtension)
+        self.imageImporter.release(job)
+        data['imageExists'] = True
+        data['imageHash'] = job.imageHash
+        data['fileExtension'] = job.fileExtension
+        self.wordStore.put(wordName, data)
+        self.prefetcher.invalidate(wordName)
+
+    def showImportProgress(self, done: int, total: int):
+        if total == 0 or done == total:
+            self.statusBar().clearMessage()
+        else:
+            self.statusBar().showMessage(f'Importing images... {done}/{total}')
+
+    # Searches over definitions and sentences wait for the full-text index while it is still being built in the background
+    def requestSearch(self, immediate: bool = False):
+        if self.searchMode == searchindex.SearchMode.TEXT and not self.wordIndex.fullTextReady.is_set():
+            self.statusBar().showMessage(FULL_TEXT_BUILDING_MESSAGE)
+        self.searchWorker.request(self.searchWord_LineEdit.text(), immediate=immediate, mode=self.searchMode)
+
+    # Only the result of the latest query is shown, and only while its Search Words menu is still open
+    def applySearchResults(self, result: searchworker.SearchResult):
+        if self.currentMenu != Menu.SEARCH_WORD or not self.searchWorker.isLatest(result.generation):
+            return
+        if result.query != self.searchWord_LineEdit.text() or result.mode != self.searchMode:
+            return
+        self.searchWord_UpdateResultList(result.matchedWords(), result.latency, bool(result.similar))
+
+    # The entry of wordName, from the prefetcher if Surf Words has already warmed it
+    def getEntry(self, wordName: str):
+        data = self.prefetcher.get(wordName)
+        if data is None:
+            data = self.wordStore.get(wordName)
+        return data
+
+    def removeWord(self, wordName: str):
+        data = self.wordStore.get(wordName)
+        self.wordStore.remove(wordName)
+        self.prefetcher.invalidate(wordName)
+        self.wordIndex.remove(wordName)
+        self.randomWords.remove(wordName)
+        self.imageStore.detach(wordName)
+        if data['imageExists'] and not data.get('imageHash'):
+            self.imageStore.removeLegacyImage(wordName, data['fileExtension'])
+
     # Creates a label with given height and returns it
     def getVerticalSpacer(self, height):
         spacer = QtWidgets.QLabel(" ")
@@ -1040,12 +1234,14 @@ class MainWindow(QtWidgets.QMainWindow):
         return spacer
     
     def saveWordData(self):
-        with open(f"{word.dataFoldername}/words.json", 'w') as f:
-            json.dump(self.wordDataDict, f)
+        # The window can be closed while the words are still loading or the full-text index is being built
+        self.wordLoader.stop()
+        if self.wordLoader.wordStore is not None:
+            self.wordLoader.wordStore.close()
     
     def saveAppdata(self):
-        with open(f"{word.dataFoldername}/appdata.json", 'w') as f:
-            json.dump(self.appdataDict, f)
+        appdata = json.dumps(self.appdataDict)
+        self.backgroundSaver.schedule('appdata', lambda: saver.atomicWrite(f"{word.dataFoldername}/appdata.json", appdata))
 
 
     def center(self):
@@ -1056,11 +1252,22 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
 def main():
+    profile = None
+    if '--profile-startup' in sys.argv:
+        sys.argv.remove('--profile-startup')
+        profile = startupprofile.StartupProfile(importsStarted)
+        profile.mark('imports')
+
     app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow()
+    if profile is not None:
+        profile.mark('QApplication')
+    window = MainWindow(profile)
     exit_code = app.exec()
-    window.saveWordData()
+    window.imageImporter.shutdown()
+    app.processEvents()
     window.saveAppdata()
+    window.saveWordData()
+    window.backgroundSaver.stop()
     sys.exit(exit_code)
 
 if __name__ == '__main__':
@@ -0,0 +1,114 @@
+import os
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+import word
+import thumbnails
+
+# How many words before and after the shown one are warmed
+radius = 3
+
+
+def entrySize(data: dict):
+    return sys.getsizeof(data) + sum(sys.getsizeof(text) for text in data['definitions'] + data['exampleSentences'])
+
+
+# The words around wordName in alphabetical order, closest first and alternating between next and previous
+def neighbourhood(wordIndex, wordName: str, radius: int = radius):
+    wordNames = []
+    for distance in range(1, radius + 1):
+        for step in (distance, -distance):
+            neighbour = wordIndex.neighbour(wordName, step)
+            if neighbour is not None and neighbour != wordName and neighbour not in wordNames:
+                wordNames.append(neighbour)
+    return wordNames
+
+
+# Warms the entries and thumbnails of the words Surf Words is likely to show next on its own thread,
+# so a page flip finds them in memory. Every request replaces the previous one, a request that is
+# halfway through stops warming as soon as a newer one comes in.
+# Warmed entries are kept in an LRU within maxBytes, thumbnails go to the thumbnail cache and its own budget.
+# Callers must invalidate a word whenever its entry changes.
+class Prefetcher:
+    def __init__(self, wordStore, thumbnailCache: thumbnails.ThumbnailCache, maxBytes: int = 4 * 1024 * 1024):
+        self.wordStore = wordStore
+        self.thumbnailCache = thumbnailCache
+        self.maxBytes = maxBytes
+        self.usedBytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.generation = 0
+        self.pending = None
+        # Bumped by every invalidate, an entry read before an invalidation is not kept
+        self.version = 0
+        self.thread = threading.Thread(target=self.run, name='Prefetcher', daemon=True)
+        self.thread.start()
+
+    def request(self, wordNames: list):
+        with self.condition:
+            self.generation += 1
+            self.pending = (self.generation, wordNames)
+            self.condition.notify_all()
+
+    # The warmed entry of wordName, or None if it has not been warmed. The entry must not be changed.
+    def get(self, wordName: str):
+        with self.lock:
+            data = self.entries.get(wordName)
+            if data is not None:
+                self.entries.move_to_end(wordName)
+            return data
+
+    def invalidate(self, wordName: str):
+        with self.lock:
+            self.version += 1
+            data = self.entries.pop(wordName, None)
+            if data is not None:
+                self.usedBytes -= entrySize(data)
+
+    def remember(self, wordName: str, data: dict, version: int):
+        size = entrySize(data)
+        with self.lock:
+            if version != self.version or size > self.maxBytes:
+                return
+            previous = self.entries.pop(wordName, None)
+            if previous is not None:
+                self.usedBytes -= entrySize(previous)
+            self.entries[wordName] = data
+            self.usedBytes += size
+            while self.usedBytes > self.maxBytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.usedBytes -= entrySize(evicted)
+
+    def warm(self, wordName: str):
+        data = self.get(wordName)
+        if data is None:
+            with self.lock:
+                version = self.version
+            try:
+                data = self.wordStore.get(wordName)
+            except KeyError:
+                return
+            self.remember(wordName, data, version)
+
+        if data['imageExists']:
+            imagePath = word.imagePathFor(wordName, data.get('imageHash', ''), data['fileExtension'])
+            if os.path.exists(imagePath):
+                self.thumbnailCache.get(imagePath, data.get('imageHash', ''), thumbnails.thumbnailSize)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                generation, wordNames = self.pending
+                self.pending = None
+
+            for wordName in wordNames:
+                if generation != self.generation:
+                    break
+                try:
+                    self.warm(wordName)
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
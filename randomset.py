@@ -0,0 +1,100 @@
+import random
+
+
+# A set of words that can be added to, removed from and sampled in constant time.
+# The words are kept in a list with a dict of their positions, a removal moves the last word into the gap.
+#
+# With shuffle on, sampling works like drawing from a bag: items[:remaining] are the words not drawn yet this round,
+# a draw swaps a random one of them to the end of that region, and once the bag is empty a new round starts,
+# so every word comes up once before any word comes up again. With shuffle off every draw is uniform.
+#
+# peek chooses the next draw ahead of time without losing it, so it can be prefetched, draw hands it out.
+class RandomSet:
+    def __init__(self, words=(), shuffle: bool = True, rng: random.Random = None):
+        self.words = list(dict.fromkeys(words))
+        self.positions = {wordName: i for i, wordName in enumerate(self.words)}
+        self.remaining = len(self.words)
+        self.shuffle = shuffle
+        self.random = rng if rng is not None else random.Random()
+        self.upcoming = None
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, wordName):
+        return wordName in self.positions
+
+    def swap(self, i: int, j: int):
+        words = self.words
+        words[i], words[j] = words[j], words[i]
+        self.positions[words[i]] = i
+        self.positions[words[j]] = j
+
+    # A new word goes into the part of the bag that has not been drawn yet
+    def add(self, wordName: str):
+        if wordName in self.positions:
+            return
+        self.positions[wordName] = len(self.words)
+        self.words.append(wordName)
+        self.swap(len(self.words) - 1, self.remaining)
+        self.remaining += 1
+
+    def remove(self, wordName: str):
+        position = self.positions.get(wordName)
+        if position is None:
+            return
+        if wordName == self.upcoming:
+            self.upcoming = None
+        if position < self.remaining:
+            self.remaining -= 1
+            self.swap(position, self.remaining)
+            position = self.remaining
+        self.swap(position, len(self.words) - 1)
+        self.words.pop()
+        del self.positions[wordName]
+
+    # A random position in words[:end] other than the one of exclude, or None if there is none
+    def pickPosition(self, end: int, exclude):
+        excluded = self.positions.get(exclude, end)
+        if excluded < end:
+            if end == 1:
+                return None
+            position = self.random.randrange(end - 1)
+            return position + 1 if position >= excluded else position
+        return self.random.randrange(end) if end else None
+
+    def take(self, exclude):
+        if not self.shuffle:
+            position = self.pickPosition(len(self.words), exclude)
+            return None if position is None else self.words[position]
+
+        position = self.pickPosition(self.remaining, exclude)
+        if position is None:
+            # Only exclude is left in the bag, it is being shown anyway so the next round starts
+            self.remaining = len(self.words)
+            position = self.pickPosition(self.remaining, exclude)
+            if position is None:
+                return None
+        self.remaining -= 1
+        self.swap(position, self.remaining)
+        return self.words[self.remaining]
+
+    # Puts the peeked word back into the bag
+    def putBack(self):
+        if self.shuffle:
+            self.swap(self.positions[self.upcoming], self.remaining)
+            self.remaining += 1
+        self.upcoming = None
+
+    # The word the next draw will return, or None if there is no word other than exclude
+    def peek(self, exclude=None):
+        if self.upcoming is not None and self.upcoming == exclude:
+            self.putBack()
+        if self.upcoming is None:
+            self.upcoming = self.take(exclude)
+        return self.upcoming
+
+    def draw(self, exclude=None):
+        wordName = self.peek(exclude)
+        self.upcoming = None
+        return wordName
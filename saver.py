@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import threading
+import traceback
+
+
+# Replaces the file at path with text (str or bytes) without ever leaving a truncated file behind.
+# The text goes to a temporary file that is synced to disk before it is renamed over the original.
+def atomicWrite(path: str, text, encoding: str = 'utf-8'):
+    tmpPath = writeTemporary(path, text, encoding)
+    os.replace(tmpPath, path)
+    syncDirectory(os.path.dirname(path) or '.')
+
+
+# Writes text next to path and syncs it, returns the temporary path that is ready to be renamed
+def writeTemporary(path: str, text, encoding: str = 'utf-8'):
+    tmpPath = path + '.tmp'
+    if isinstance(text, bytes):
+        f = open(tmpPath, 'wb')
+    else:
+        f = open(tmpPath, 'w', encoding=encoding)
+    with f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmpPath
+
+
+# Makes a rename durable, directories cannot be opened for syncing on Windows
+def syncDirectory(path: str):
+    if os.name != 'posix':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Runs disk writes on its own thread. Tasks are scheduled under a key, a burst of tasks with the same key
+# is coalesced into the last one and runs once no new task has arrived for `delay` seconds.
+class BackgroundSaver(threading.Thread):
+    def __init__(self, delay: float = 0.5):
+        super().__init__(name='BackgroundSaver', daemon=True)
+        self.delay = delay
+        self.condition = threading.Condition()
+        self.pending = dict()
+        self.deadline = 0.0
+        self.busy = False
+        self.flushRequested = False
+        self.stopped = False
+
+    def schedule(self, key: str, task):
+        with self.condition:
+            self.pending[key] = task
+            self.deadline = time.monotonic() + self.delay
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if self.pending and (self.flushRequested or self.stopped):
+                        break
+                    if not self.pending:
+                        if self.stopped:
+                            return
+                        self.condition.wait()
+                        continue
+                    remaining = self.deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                tasks = list(self.pending.values())
+                self.pending.clear()
+                self.busy = True
+
+            for task in tasks:
+                try:
+                    task()
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+
+            with self.condition:
+                self.busy = False
+                if not self.pending:
+                    self.flushRequested = False
+                self.condition.notify_all()
+
+    # Blocks until every task scheduled so far has been written
+    def flush(self):
+        if not self.is_alive():
+            self.runPending()
+            return
+        with self.condition:
+            self.flushRequested = True
+            self.condition.notify_all()
+            while self.pending or self.busy:
+                self.condition.wait()
+
+    def runPending(self):
+        with self.condition:
+            tasks = list(self.pending.values())
+            self.pending.clear()
+        for task in tasks:
+            task()
+
+    def stop(self):
+        self.flush()
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.is_alive():
+            self.join()
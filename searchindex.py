@@ -0,0 +1,539 @@
+import re
+import math
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from enum import Enum
+import word
+
+# How many entries a search looks at between two checks whether it was cancelled
+cancelCheckInterval = 4096
+
+# BM25 parameters, k1 limits how much repeating a term helps and b how much long entries are penalized
+k1 = 1.2
+b = 0.75
+
+tokenPattern = re.compile(r'\w+')
+
+
+class SearchMode(Enum):
+    WORDS = 0
+    TEXT = 1
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+def neverCancelled():
+    return False
+
+
+def foldKey(wordName: str):
+    return wordName.casefold()
+
+
+# Search text is normalized like a word name before it is compared with the folded keys
+def foldQuery(query: str):
+    return foldKey(word.modifyWord(query))
+
+
+# Keeps (folded key, word) pairs sorted, so all words starting with a prefix form one run of the list
+# that bisect finds in O(log n). Results come out already sorted.
+class PrefixIndex:
+    def __init__(self, keys=()):
+        self.entries = sorted((foldKey(k), k) for k in keys)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, wordName: str):
+        entry = (foldKey(wordName), wordName)
+        i = bisect_left(self.entries, entry)
+        if i == len(self.entries) or self.entries[i] != entry:
+            self.entries.insert(i, entry)
+
+    def remove(self, wordName: str):
+        entry = (foldKey(wordName), wordName)
+        i = bisect_left(self.entries, entry)
+        if i < len(self.entries) and self.entries[i] == entry:
+            del self.entries[i]
+
+    # Position of the word in alphabetical order, or the position it would be inserted at
+    def position(self, wordName: str):
+        return bisect_left(self.entries, (foldKey(wordName), wordName))
+
+    def wordAt(self, position: int):
+        return self.entries[position][1]
+
+    def search(self, prefix: str, isCancelled=neverCancelled):
+        matches = []
+        for i in range(bisect_left(self.entries, (prefix,)), len(self.entries)):
+            folded, wordName = self.entries[i]
+            if not folded.startswith(prefix):
+                break
+            matches.append(wordName)
+            if len(matches) % cancelCheckInterval == 0 and isCancelled():
+                raise SearchCancelled()
+        return matches
+
+
+def trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Keys are indexed with two padding characters on each side, so even short keys have trigrams and
+# the start and end of a key count when comparing two keys
+padding = '\x00\x00'
+
+
+def paddedTrigrams(text: str):
+    return trigrams(padding + text + padding)
+
+
+# How far a word may be from a query to be suggested, short words only allow one typo
+def maxDistanceFor(length: int):
+    if length < 2:
+        return 0
+    return 1 if length <= 4 else 2
+
+
+# Levenshtein distance, or maxDistance + 1 as soon as it is clear that the distance is larger than maxDistance
+def editDistance(a: str, b: str, maxDistance: int):
+    if abs(len(a) - len(b)) > maxDistance:
+        return maxDistance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > maxDistance:
+            return maxDistance + 1
+        previous = current
+    return previous[-1]
+
+
+# Maps every padded trigram of the folded keys to the ids of the words containing it. A substring query only has to
+# verify the words that contain all of its trigrams. Removed words leave a hole in their posting lists
+# until enough of them pile up to rebuild the index.
+class TrigramIndex:
+    def __init__(self, keys=()):
+        self.build(keys)
+
+    def build(self, keys):
+        self.words = []
+        self.ids = dict()
+        self.postings = dict()
+        self.removed = 0
+        for wordName in keys:
+            self.add(wordName)
+
+    def add(self, wordName: str):
+        if wordName in self.ids:
+            return
+        wordId = len(self.words)
+        folded = foldKey(wordName)
+        self.words.append((folded, wordName))
+        self.ids[wordName] = wordId
+        for trigram in paddedTrigrams(folded):
+            posting = self.postings.get(trigram)
+            if posting is None:
+                posting = self.postings[trigram] = array('I')
+            posting.append(wordId)
+
+    def remove(self, wordName: str):
+        wordId = self.ids.pop(wordName, None)
+        if wordId is None:
+            return
+        self.words[wordId] = None
+        self.removed += 1
+        if self.removed > 1024 and self.removed * 2 > len(self.words):
+            self.build([entry[1] for entry in self.words if entry is not None])
+
+    # Words whose folded key contains the folded query, sorted like PrefixIndex results
+    def search(self, folded: str, isCancelled=neverCancelled):
+        queryTrigrams = trigrams(folded)
+        if not queryTrigrams:
+            matches = []
+            for i, entry in enumerate(self.words):
+                if entry is not None and folded in entry[0]:
+                    matches.append(entry)
+                if i % cancelCheckInterval == 0 and isCancelled():
+                    raise SearchCancelled()
+            matches.sort()
+            return matches
+
+        postings = []
+        for trigram in queryTrigrams:
+            posting = self.postings.get(trigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if isCancelled():
+                raise SearchCancelled()
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        if isCancelled():
+            raise SearchCancelled()
+
+        matches = []
+        for wordId in candidates:
+            entry = self.words[wordId]
+            if entry is not None and folded in entry[0]:
+                matches.append(entry)
+        matches.sort()
+        return matches
+
+    # Words whose folded key is at most maxDistance edits away from the folded query, closest first.
+    # Every edit changes at most three padded trigrams, so a word within maxDistance shares at least
+    # len(queryTrigrams) - 3 * maxDistance trigrams with the query. Counting shared trigrams over the
+    # posting lists leaves only a few candidates whose distance has to be computed.
+    # Queries with too few distinct trigrams for that bound to prune anything, like "aaaaaaa", check every word
+    # of a close enough length instead.
+    def searchSimilar(self, folded: str, maxDistance: int, isCancelled=neverCancelled):
+        if maxDistance <= 0:
+            return []
+        queryTrigrams = paddedTrigrams(folded)
+        minShared = len(queryTrigrams) - 3 * maxDistance
+        if minShared <= 0:
+            return self.scanSimilar(folded, maxDistance, isCancelled)
+
+        shared = Counter()
+        for trigram in queryTrigrams:
+            posting = self.postings.get(trigram)
+            if posting is not None:
+                shared.update(posting)
+        if isCancelled():
+            raise SearchCancelled()
+
+        matches = []
+        for i, (wordId, count) in enumerate(shared.items()):
+            if i % cancelCheckInterval == 0 and isCancelled():
+                raise SearchCancelled()
+            entry = self.words[wordId]
+            if count < minShared or entry is None:
+                continue
+            distance = editDistance(folded, entry[0], maxDistance)
+            if distance <= maxDistance:
+                matches.append((distance, entry[0], entry[1]))
+        matches.sort()
+        return matches
+
+    def scanSimilar(self, folded: str, maxDistance: int, isCancelled=neverCancelled):
+        matches = []
+        for i, entry in enumerate(self.words):
+            if i % cancelCheckInterval == 0 and isCancelled():
+                raise SearchCancelled()
+            if entry is None or abs(len(entry[0]) - len(folded)) > maxDistance:
+                continue
+            distance = editDistance(folded, entry[0], maxDistance)
+            if distance <= maxDistance:
+                matches.append((distance, entry[0], entry[1]))
+        matches.sort()
+        return matches
+
+
+def tokenize(text: str):
+    return tokenPattern.findall(text.casefold())
+
+
+# Inverted index over the definitions and example sentences of every entry, ranked with BM25.
+# A term's posting list is one array that packs the document id and the term frequency, capped at 15
+# where BM25 has long stopped caring, into each item.
+# Removed words leave a hole in the posting lists, like in TrigramIndex, until enough of them pile up
+# to filter the lists again. Until then they still count towards the document frequency of their terms.
+class FullTextIndex:
+    def __init__(self):
+        self.ids = dict()
+        self.words = []
+        self.lengths = array('I')
+        self.postings = dict()
+        self.totalLength = 0
+        self.removed = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, wordName: str, data: dict):
+        self.remove(wordName)
+        tokens = tokenize(' '.join(data['definitions']) + ' ' + ' '.join(data['exampleSentences']))
+        docId = len(self.words)
+        postings = self.postings
+        for term, frequency in Counter(tokens).items():
+            posting = postings.get(term)
+            if posting is None:
+                posting = postings[term] = array('I')
+            posting.append(docId << 4 | (frequency if frequency < 16 else 15))
+
+        self.ids[wordName] = docId
+        self.words.append(wordName)
+        self.lengths.append(len(tokens))
+        self.totalLength += len(tokens)
+
+    def remove(self, wordName: str):
+        docId = self.ids.pop(wordName, None)
+        if docId is None:
+            return
+        self.words[docId] = None
+        self.totalLength -= self.lengths[docId]
+        self.removed += 1
+        if self.removed > 1024 and self.removed * 2 > len(self.words):
+            self.dropRemoved()
+
+    def dropRemoved(self):
+        for term in list(self.postings):
+            posting = array('I', (item for item in self.postings[term] if self.words[item >> 4] is not None))
+            if posting:
+                self.postings[term] = posting
+            else:
+                del self.postings[term]
+        self.removed = 0
+
+    # Returns up to `limit` words ordered by their BM25 score for the query, best first.
+    # Rare terms are scored first, their postings are the short ones.
+    def search(self, query: str, isCancelled=neverCancelled, limit: int = 1000):
+        postings = [self.postings[t] for t in dict.fromkeys(tokenize(query)) if t in self.postings]
+        if not postings:
+            return []
+        postings.sort(key=len)
+
+        documentCount = len(self.words)
+        averageLength = max(self.totalLength / max(len(self.ids), 1), 1.0)
+        words, lengths = self.words, self.lengths
+        scores = dict()
+        for posting in postings:
+            idf = math.log(1 + (documentCount - len(posting) + 0.5) / (len(posting) + 0.5))
+            for start in range(0, len(posting), cancelCheckInterval):
+                if isCancelled():
+                    raise SearchCancelled()
+                for item in posting[start:start + cancelCheckInterval]:
+                    docId, frequency = item >> 4, item & 15
+                    if words[docId] is None:
+                        continue
+                    norm = k1 * (1 - b + b * lengths[docId] / averageLength)
+                    scores[docId] = scores.get(docId, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], words[item[0]]))
+        return [words[docId] for docId, _ in best]
+
+
+# All the lookups the Search Words menu needs, kept up to date on every add and remove.
+# Searches may run on a worker thread, the lock keeps them from seeing an index halfway through a change.
+# The full-text index needs every entry, so it is built from `entrySource()` (an iterable of (word, entry) pairs)
+# by buildFullText, which the app runs in the background once the words are loaded, or else by the first search over
+# definitions and sentences. Searches wait for a running build. Changes made while it is being built
+# are kept in a backlog and applied once the build is done.
+#
+# Results are cached by mode and normalized query, stamped with the version of the index they were computed on.
+# Every add and remove bumps the version, which makes all cached results stale. The cache holds at most
+# cacheBudget words over all its results, least recently used results are dropped first.
+class WordIndex:
+    cacheBudget = 1000000
+    # Filtering a cached result beats the trigram index only while the result is small
+    refineLimit = 4096
+
+    def __init__(self, keys=(), entrySource=None):
+        keys = list(keys)
+        self.lock = threading.RLock()
+        self.prefix = PrefixIndex(keys)
+        self.substring = TrigramIndex(keys)
+        self.entrySource = entrySource
+        self.fullText = None
+        self.fullTextBacklog = None
+        self.fullTextReady = threading.Event()
+        self.version = 0
+        self.cache = OrderedDict()
+        self.cachedWords = 0
+
+    def __len__(self):
+        return len(self.prefix)
+
+    # `data` is the entry of the word, it is needed to keep the full-text index up to date
+    def add(self, wordName: str, data: dict = None):
+        with self.lock:
+            self.version += 1
+            self.prefix.add(wordName)
+            self.substring.add(wordName)
+            if data is not None:
+                self.updateFullText(wordName, data)
+
+    def remove(self, wordName: str):
+        with self.lock:
+            self.version += 1
+            self.prefix.remove(wordName)
+            self.substring.remove(wordName)
+            self.updateFullText(wordName, None)
+
+    def wordAt(self, position: int):
+        with self.lock:
+            return self.prefix.wordAt(position)
+
+    # The word `step` places away from wordName in alphabetical order, wrapping around at both ends.
+    # wordName does not have to be in the index, a removed word still has its neighbours.
+    def neighbour(self, wordName: str, step: int):
+        with self.lock:
+            count = len(self.prefix)
+            if count == 0:
+                return None
+            position = self.prefix.position(wordName)
+            if step > 0 and (position == count or self.prefix.wordAt(position) != wordName):
+                position -= 1
+            return self.prefix.wordAt((position + step) % count)
+
+    def updateFullText(self, wordName: str, data: dict):
+        if self.fullTextBacklog is not None:
+            self.fullTextBacklog.append((wordName, data))
+        elif self.fullText is None:
+            return
+        elif data is None:
+            self.fullText.remove(wordName)
+        else:
+            self.fullText.add(wordName, data)
+
+    # Builds the full-text index outside the lock, so adding and removing words never waits for it.
+    # Returns at once if another thread is building it already. A cancelled build is thrown away and raises SearchCancelled.
+    def buildFullText(self, isCancelled=neverCancelled):
+        with self.lock:
+            if self.fullText is not None or self.fullTextBacklog is not None:
+                return
+            self.fullTextBacklog = []
+
+        fullText = FullTextIndex()
+        try:
+            for i, (wordName, data) in enumerate(self.entrySource() if self.entrySource is not None else ()):
+                if i % cancelCheckInterval == 0 and isCancelled():
+                    raise SearchCancelled()
+                fullText.add(wordName, data)
+        except BaseException:
+            with self.lock:
+                self.fullTextBacklog = None
+            raise
+
+        with self.lock:
+            for wordName, data in self.fullTextBacklog:
+                if data is None:
+                    fullText.remove(wordName)
+                else:
+                    fullText.add(wordName, data)
+            self.fullTextBacklog = None
+            self.fullText = fullText
+        self.fullTextReady.set()
+
+    # Waits for the full-text index, building it on this thread unless another one is building it already
+    def waitForFullText(self, isCancelled=neverCancelled):
+        while not self.fullTextReady.is_set():
+            with self.lock:
+                building = self.fullTextBacklog is not None
+            if building:
+                self.fullTextReady.wait(0.05)
+                if isCancelled():
+                    raise SearchCancelled()
+            else:
+                self.buildFullText(isCancelled)
+
+    def cachedResult(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] != self.version:
+            del self.cache[key]
+            self.cachedWords -= entry[2]
+            return None
+        self.cache.move_to_end(key)
+        return entry[1]
+
+    def remember(self, key, result):
+        size = sum(map(len, result))
+        if size > self.cacheBudget:
+            return
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.cachedWords -= entry[2]
+        self.cache[key] = (self.version, result, size)
+        self.cachedWords += size
+        while self.cachedWords > self.cacheBudget:
+            _, evicted = self.cache.popitem(last=False)
+            self.cachedWords -= evicted[2]
+
+    # The cached result of the longest shorter query that the folded query extends, if there is one and it is
+    # worth filtering. Queries shorter than a trigram would otherwise scan every word, so they always refine.
+    def refinableResult(self, folded: str):
+        for end in range(len(folded) - 1, 0, -1):
+            result = self.cachedResult((SearchMode.WORDS, folded[:end]))
+            if result is not None:
+                if len(folded) < 3 or len(result[0]) + len(result[1]) <= self.refineLimit:
+                    return result
+                return None
+        return None
+
+    # Every word that starts with or contains the query also matched the shorter query it extends,
+    # so filtering that result costs time proportional to it instead of a search of the whole index
+    def refine(self, parent, folded: str, isCancelled=neverCancelled):
+        parentStartsWith, parentIncludes, _ = parent
+        startsWith, includesFromStartsWith = [], []
+        for i, wordName in enumerate(parentStartsWith):
+            if i % cancelCheckInterval == 0 and isCancelled():
+                raise SearchCancelled()
+            key = foldKey(wordName)
+            if key.startswith(folded):
+                startsWith.append(wordName)
+            elif folded in key:
+                includesFromStartsWith.append(wordName)
+
+        includes = []
+        for i, wordName in enumerate(parentIncludes):
+            if i % cancelCheckInterval == 0 and isCancelled():
+                raise SearchCancelled()
+            if folded in foldKey(wordName):
+                includes.append(wordName)
+        if includesFromStartsWith:
+            includes = list(heapq.merge(includesFromStartsWith, includes, key=lambda w: (foldKey(w), w)))
+        return startsWith, includes
+
+    # In SearchMode.WORDS returns the words starting with the query and the words that only contain it.
+    # When there are neither, the words within a typo or two of the query are returned as similar words.
+    # In SearchMode.TEXT returns the words whose definitions and sentences match the query best as startsWith,
+    # a query without any terms lists the words like SearchMode.WORDS does.
+    # Always returns (startsWith, includes, similar), raises SearchCancelled as soon as isCancelled returns True.
+    # The lists may be shared with the cache, callers must not change them.
+    def search(self, query: str, isCancelled=neverCancelled, mode: SearchMode = SearchMode.WORDS):
+        terms = tokenize(query) if mode == SearchMode.TEXT else None
+        if terms:
+            self.waitForFullText(isCancelled)
+            key = (mode, ' '.join(terms))
+            with self.lock:
+                result = self.cachedResult(key)
+                if result is None:
+                    result = self.fullText.search(query, isCancelled), [], []
+                    self.remember(key, result)
+            return result
+
+        folded = foldQuery(query)
+        key = (SearchMode.WORDS, folded)
+        with self.lock:
+            result = self.cachedResult(key)
+            if result is not None:
+                return result
+
+            parent = self.refinableResult(folded)
+            if parent is not None:
+                startsWith, includes = self.refine(parent, folded, isCancelled)
+            else:
+                startsWith = self.prefix.search(folded, isCancelled)
+                includes = []
+                if folded:
+                    includes = [w for f, w in self.substring.search(folded, isCancelled) if not f.startswith(folded)]
+            similar = []
+            if folded and not startsWith and not includes:
+                similar = [w for _, _, w in self.substring.searchSimilar(folded, maxDistanceFor(len(folded)), isCancelled)]
+
+            result = startsWith, includes, similar
+            self.remember(key, result)
+        return result
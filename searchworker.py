@@ -0,0 +1,72 @@
+import sys
+import time
+import threading
+import traceback
+from PyQt5 import QtCore
+import searchindex
+
+
+class SearchResult:
+    def __init__(self, generation: int, query: str, mode: searchindex.SearchMode, startsWith: list, includes: list, similar: list, latency: float):
+        self.generation = generation
+        self.query = query
+        self.mode = mode
+        self.startsWith = startsWith
+        self.includes = includes
+        self.similar = similar
+        self.latency = latency
+
+    def matchedWords(self):
+        return self.startsWith + self.includes + self.similar
+
+
+# Runs Search Words queries on its own thread. A query starts once typing has paused for `delay` seconds,
+# every newer query cancels the one in flight, and only the result of the latest query is emitted.
+# latency is measured from the keystroke to the moment the result is ready.
+class SearchWorker(QtCore.QObject):
+    resultsReady = QtCore.pyqtSignal(object)
+
+    def __init__(self, wordIndex: searchindex.WordIndex, delay: float = 0.15):
+        super().__init__()
+        self.wordIndex = wordIndex
+        self.delay = delay
+        self.condition = threading.Condition()
+        self.generation = 0
+        self.pending = None
+        self.deadline = 0.0
+        self.thread = threading.Thread(target=self.run, name='SearchWorker', daemon=True)
+        self.thread.start()
+
+    def request(self, query: str, immediate: bool = False, mode: searchindex.SearchMode = searchindex.SearchMode.WORDS):
+        with self.condition:
+            self.generation += 1
+            self.pending = (self.generation, query, mode, time.perf_counter())
+            self.deadline = time.monotonic() + (0 if immediate else self.delay)
+            self.condition.notify_all()
+
+    def isLatest(self, generation: int):
+        return generation == self.generation
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if self.pending is None:
+                        self.condition.wait()
+                        continue
+                    remaining = self.deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                generation, query, mode, requested = self.pending
+                self.pending = None
+
+            try:
+                startsWith, includes, similar = self.wordIndex.search(query, lambda: not self.isLatest(generation), mode)
+            except searchindex.SearchCancelled:
+                continue
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+                continue
+            if self.isLatest(generation):
+                self.resultsReady.emit(SearchResult(generation, query, mode, startsWith, includes, similar, time.perf_counter() - requested))
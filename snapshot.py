@@ -0,0 +1,198 @@
+import os
+import sys
+import mmap
+import json
+import struct
+import argparse
+import saver
+import word
+
+# Binary snapshot of a dictionary, all integers are little endian.
+#
+#   header     magic, entry count, a reserved uint32 that is written as 0 and keeps the offsets 8 byte aligned,
+#              offset of the key table, offset of the first blob
+#   key table  one record per word sorted by the utf-8 bytes of the word:
+#              key offset, key length, blob offset, blob length
+#   keys       the utf-8 bytes of every word
+#   blobs      one entry per word in the Word.getAsDictionary layout:
+#              image flag, extension, image hash, definition count and definitions, sentence count and sentences
+#
+# Everything is addressed by offset, so a reader maps the file and only touches the pages it needs.
+
+magic = b'YDSNAP\x00\x01'
+headerStruct = struct.Struct('<8sIIQQ')
+recordStruct = struct.Struct('<QIQI')
+countStruct = struct.Struct('<I')
+flagStruct = struct.Struct('<BH')
+reserved = 0
+
+
+def encodeEntry(data: dict):
+    extension = data['fileExtension'].encode('utf-8')
+    imageHash = data.get('imageHash', '').encode('ascii')
+    parts = [flagStruct.pack(1 if data['imageExists'] else 0, len(extension)), extension, struct.pack('<H', len(imageHash)), imageHash]
+    for strings in (data['definitions'], data['exampleSentences']):
+        parts.append(countStruct.pack(len(strings)))
+        for s in strings:
+            encoded = s.encode('utf-8')
+            parts.append(countStruct.pack(len(encoded)))
+            parts.append(encoded)
+    return b''.join(parts)
+
+
+def decodeEntry(buffer, offset: int, length: int):
+    end = offset + length
+    imageExists, extensionLength = flagStruct.unpack_from(buffer, offset)
+    offset += flagStruct.size
+    fileExtension = bytes(buffer[offset:offset + extensionLength]).decode('utf-8')
+    offset += extensionLength
+    hashLength, = struct.unpack_from('<H', buffer, offset)
+    offset += 2
+    imageHash = bytes(buffer[offset:offset + hashLength]).decode('ascii')
+    offset += hashLength
+
+    lists = []
+    for _ in range(2):
+        count, = countStruct.unpack_from(buffer, offset)
+        offset += countStruct.size
+        strings = []
+        for _ in range(count):
+            size, = countStruct.unpack_from(buffer, offset)
+            offset += countStruct.size
+            strings.append(bytes(buffer[offset:offset + size]).decode('utf-8'))
+            offset += size
+        lists.append(strings)
+    if offset != end:
+        raise ValueError('Corrupted snapshot entry')
+
+    return {'imageExists': bool(imageExists), 'imageHash': imageHash, 'definitions': lists[0], 'exampleSentences': lists[1], 'fileExtension': fileExtension}
+
+
+# Lays out a snapshot from (word, encoded entry) pairs.
+# Returns the file contents and the blob offset and length of every word.
+def encodeSnapshot(entries):
+    entries = sorted(((key.encode('utf-8'), key, blob) for key, blob in entries), key=lambda e: e[0])
+    keyTableOffset = headerStruct.size
+    keysOffset = keyTableOffset + recordStruct.size * len(entries)
+    blobsOffset = keysOffset + sum(len(e[0]) for e in entries)
+
+    records = []
+    offsets = []
+    keyPosition = keysOffset
+    blobPosition = blobsOffset
+    for encodedKey, key, blob in entries:
+        records.append(recordStruct.pack(keyPosition, len(encodedKey), blobPosition, len(blob)))
+        offsets.append((key, blobPosition, len(blob)))
+        keyPosition += len(encodedKey)
+        blobPosition += len(blob)
+
+    header = headerStruct.pack(magic, len(entries), reserved, keyTableOffset, blobsOffset)
+    parts = [header, b''.join(records), b''.join(e[0] for e in entries), b''.join(e[2] for e in entries)]
+    return b''.join(parts), offsets
+
+
+class SnapshotReader:
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        fileMagic, self.count, _, self.keyTableOffset, self.blobsOffset = headerStruct.unpack_from(self.buffer, 0)
+        if fileMagic != magic:
+            self.close()
+            raise ValueError(f'{path} is not a dictionary snapshot')
+
+    def __len__(self):
+        return self.count
+
+    def record(self, index: int):
+        return recordStruct.unpack_from(self.buffer, self.keyTableOffset + index * recordStruct.size)
+
+    def keyBytes(self, index: int):
+        keyOffset, keyLength, _, _ = self.record(index)
+        return self.buffer[keyOffset:keyOffset + keyLength]
+
+    # Yields every word with the offset and length of its entry, in key order
+    def items(self):
+        for i in range(self.count):
+            keyOffset, keyLength, blobOffset, blobLength = self.record(i)
+            yield self.buffer[keyOffset:keyOffset + keyLength].decode('utf-8'), blobOffset, blobLength
+
+    # Binary search over the sorted key table
+    def find(self, key: str):
+        target = key.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.keyBytes(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.keyBytes(low) == target:
+            return low
+        return -1
+
+    def get(self, key: str):
+        index = self.find(key)
+        if index < 0:
+            raise KeyError(key)
+        _, _, blobOffset, blobLength = self.record(index)
+        return self.decode(blobOffset, blobLength)
+
+    def decode(self, offset: int, length: int):
+        return decodeEntry(self.buffer, offset, length)
+
+    def blob(self, offset: int, length: int):
+        return self.buffer[offset:offset + length]
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+
+def jsonToSnapshot(jsonPath: str, snapshotPath: str):
+    with open(jsonPath, encoding='utf-8') as f:
+        words = json.load(f)
+    data, _ = encodeSnapshot((key, encodeEntry(entry)) for key, entry in words.items())
+    saver.atomicWrite(snapshotPath, data)
+    return len(words)
+
+
+def snapshotToJson(snapshotPath: str, jsonPath: str):
+    reader = SnapshotReader(snapshotPath)
+    try:
+        words = {key: reader.decode(offset, length) for key, offset, length in reader.items()}
+    finally:
+        reader.close()
+    saver.atomicWrite(jsonPath, json.dumps(words))
+    return len(words)
+
+
+def main():
+    # wordstore imports this module for its binary backend
+    import wordstore
+
+    parser = argparse.ArgumentParser(description='Converts the words of Your Dictionary between words.json and the binary words.snap')
+    parser.add_argument('direction', choices=['to-binary', 'to-json'])
+    parser.add_argument('--folder', default=word.dataFoldername)
+    args = parser.parse_args()
+
+    # Journals are folded into their snapshot first, the converted file then replaces the other backend's data
+    if args.direction == 'to-binary':
+        source, target = wordstore.JsonWordStore(args.folder), wordstore.BinaryWordStore(args.folder)
+        convert = jsonToSnapshot
+    else:
+        source, target = wordstore.BinaryWordStore(args.folder), wordstore.JsonWordStore(args.folder)
+        convert = snapshotToJson
+    source.load()
+    source.compact()
+    source.close()
+    target.close()
+
+    count = convert(source.snapshotPath, target.snapshotPath)
+    for path in (target.journalPath, target.compactingPath, target.indexPath):
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+    print(f'Converted {count} words from {source.snapshotPath} to {target.snapshotPath}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import sys
+import time
+from PyQt5 import QtCore
+
+
+# Collects the time of each startup step for --profile-startup and prints them once the window has been painted
+# and the words are ready, whichever comes last. Times are in ms since the imports of main started.
+class StartupProfile(QtCore.QObject):
+    def __init__(self, started: float):
+        super().__init__()
+        self.started = started
+        self.marks = []
+        self.details = dict()
+        self.painted = False
+        self.loaded = False
+
+    def mark(self, name: str, details: list = None):
+        self.marks.append((name, time.perf_counter()))
+        if details:
+            self.details[name] = details
+
+    # Marks the first paint of widget
+    def watchPaint(self, widget):
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Paint and not self.painted:
+            watched.removeEventFilter(self)
+            self.painted = True
+            self.mark('first paint')
+            self.reportIfDone()
+        return False
+
+    def wordsLoaded(self, timings: list):
+        self.loaded = True
+        self.mark('words ready', timings)
+        self.reportIfDone()
+
+    def reportIfDone(self):
+        if not (self.painted and self.loaded):
+            return
+        print('Startup profile, ms since the imports started', file=sys.stderr)
+        previous = self.started
+        for name, at in self.marks:
+            print(f'  {name:20} {(at - self.started) * 1000:9.1f}  (+{(at - previous) * 1000:.1f})', file=sys.stderr)
+            previous = at
+            for detail, seconds in self.details.get(name, []):
+                print(f'    {detail:18} {seconds * 1000:9.1f}', file=sys.stderr)
@@ -0,0 +1,39 @@
+import io
+import argparse
+import wordstore
+import cli
+
+
+def test_csv_header_is_skipped_but_a_word_named_word_is_not():
+    f = io.StringIO('word,definitions,exampleSentences\nword,a unit of language|a promise,\napple,a fruit,\n')
+    rows = list(cli.readRows(f, 'csv', '|'))
+    assert rows == [('word', ['a unit of language', 'a promise'], []), ('apple', ['a fruit'], [])]
+
+
+def test_first_row_without_header_is_kept():
+    f = io.StringIO('word\ta unit of language\t\n')
+    assert list(cli.readRows(f, 'tsv', '|')) == [('word', ['a unit of language'], [])]
+
+
+def test_import_keeps_the_image_of_existing_words(tmp_path):
+    folder = str(tmp_path)
+    store = wordstore.openWordStore(folder)
+    store.load()
+    store.put('Apple', {'imageExists': True, 'imageHash': 'abc', 'definitions': ['old'], 'exampleSentences': [], 'fileExtension': 'jpg'})
+    store.close()
+
+    path = tmp_path / 'words.csv'
+    path.write_text('word,definitions,exampleSentences\napple,a fruit,\npear,another fruit,\n', encoding='utf-8')
+    cli.importWords(argparse.Namespace(file=str(path), format=None, folder=folder, backend='json', list_separator='|', batch_size=1000, skip_existing=False))
+
+    store = wordstore.openWordStore(folder)
+    store.load()
+    assert store.get('Apple') == {'imageExists': True, 'imageHash': 'abc', 'definitions': ['A fruit'], 'exampleSentences': [], 'fileExtension': 'jpg'}
+    assert store.get('Pear')['imageExists'] is False
+    store.close()
+
+
+def test_backend_defaults_to_the_one_in_appdata(tmp_path):
+    assert cli.configuredBackend(str(tmp_path)) == 'json'
+    (tmp_path / 'appdata.json').write_text('{"storage_backend": "sqlite"}', encoding='utf-8')
+    assert cli.configuredBackend(str(tmp_path)) == 'sqlite'
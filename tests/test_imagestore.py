@@ -0,0 +1,49 @@
+import os
+import imagestore
+import wordstore
+
+
+def test_garbage_collection_keeps_images_missing_from_refs(tmp_path):
+    folder = str(tmp_path)
+    store = wordstore.openWordStore(folder, 'sqlite')
+    store.load()
+    images = imagestore.ImageStore(folder)
+    images.load(store.iterEntries)
+
+    # The entry was committed but the crash came before refs.json was saved
+    os.makedirs(images.imageFolder, exist_ok=True)
+    for filename in ('abc.jpg', 'orphan.jpg'):
+        with open(f'{images.imageFolder}/{filename}', 'wb') as f:
+            f.write(b'image')
+    store.put('Apple', {'imageExists': True, 'imageHash': 'abc', 'definitions': ['a'], 'exampleSentences': [], 'fileExtension': 'jpg'})
+
+    assert images.collectGarbage() == (1, 5)
+    assert sorted(os.listdir(images.imageFolder)) == ['abc.jpg']
+    store.close()
+
+
+def test_garbage_collection_removes_thumbnails_of_removed_images(tmp_path):
+    images = imagestore.ImageStore(str(tmp_path))
+    images.load()
+    os.makedirs(images.thumbnailFolder)
+    for path in (f'{images.imageFolder}/abc.jpg', f'{images.imageFolder}/kept.jpg',
+                 f'{images.thumbnailFolder}/abc_128.png', f'{images.thumbnailFolder}/abc_64.png', f'{images.thumbnailFolder}/kept_128.png'):
+        with open(path, 'wb') as f:
+            f.write(b'x')
+    images.addReference('Kept', 'kept', 'jpg')
+
+    assert images.collectGarbage() == (3, 3)
+    assert os.listdir(images.thumbnailFolder) == ['kept_128.png']
+
+
+def test_garbage_collection_skips_the_entries_when_every_image_is_in_refs(tmp_path):
+    def entrySource():
+        raise AssertionError('the entries were read')
+
+    images = imagestore.ImageStore(str(tmp_path))
+    images.load(entrySource)
+    with open(f'{images.imageFolder}/kept.jpg', 'wb') as f:
+        f.write(b'x')
+    images.addReference('Kept', 'kept', 'jpg')
+
+    assert images.collectGarbage() == (0, 0)
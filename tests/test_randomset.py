@@ -0,0 +1,59 @@
+import random
+import randomset
+
+
+def checkInvariants(words: randomset.RandomSet, expected: set):
+    assert set(words.words) == expected and len(words.words) == len(expected)
+    assert all(words.positions[wordName] == i for i, wordName in enumerate(words.words))
+    assert 0 <= words.remaining <= len(words)
+    # A peeked word is held out of the bag until it is drawn or put back
+    if words.upcoming is not None and words.shuffle:
+        assert words.positions[words.upcoming] >= words.remaining
+
+
+def test_every_word_is_drawn_once_per_round():
+    words = randomset.RandomSet([f'w{i}' for i in range(50)], rng=random.Random(0))
+    for _ in range(3):
+        assert sorted(words.draw() for _ in range(50)) == sorted(f'w{i}' for i in range(50))
+
+
+def test_invariants_hold_through_adds_removes_and_peeks():
+    rng = random.Random(2)
+    expected = {f'w{i}' for i in range(20)}
+    words = randomset.RandomSet(sorted(expected), rng=random.Random(3))
+    for step in range(5000):
+        action = rng.random()
+        if action < 0.25:
+            wordName = f'w{rng.randrange(40)}'
+            words.add(wordName)
+            expected.add(wordName)
+        elif action < 0.45 and expected:
+            wordName = rng.choice(sorted(expected))
+            words.remove(wordName)
+            expected.discard(wordName)
+        elif action < 0.7:
+            exclude = rng.choice(sorted(expected)) if expected and rng.random() < 0.5 else None
+            peeked = words.peek(exclude)
+            assert peeked != exclude or peeked is None
+            assert peeked is None or peeked in expected
+        else:
+            exclude = rng.choice(sorted(expected)) if expected and rng.random() < 0.5 else None
+            drawn = words.draw(exclude)
+            assert drawn is None or (drawn in expected and drawn != exclude)
+            assert drawn is not None or len(expected - {exclude}) == 0
+        checkInvariants(words, expected)
+
+
+def test_peeked_word_is_the_next_draw_and_survives_an_add():
+    words = randomset.RandomSet(['a', 'b', 'c'], rng=random.Random(4))
+    peeked = words.peek()
+    words.add('d')
+    assert words.draw() == peeked
+    # The rest of the round still holds every other word once
+    assert sorted(words.draw() for _ in range(3)) == sorted({'a', 'b', 'c', 'd'} - {peeked})
+
+
+def test_uniform_mode_never_repeats_the_excluded_word():
+    words = randomset.RandomSet(['a', 'b'], shuffle=False, rng=random.Random(5))
+    assert all(words.draw('a') == 'b' for _ in range(20))
+    assert randomset.RandomSet(['a'], shuffle=False).draw('a') is None
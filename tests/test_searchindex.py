@@ -0,0 +1,70 @@
+import random
+import pytest
+import searchindex
+
+
+def levenshtein(a: str, b: str):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def bruteForceSimilar(keys, folded: str, maxDistance: int):
+    matches = []
+    for key in keys:
+        distance = levenshtein(folded, searchindex.foldKey(key))
+        if distance <= maxDistance:
+            matches.append((distance, searchindex.foldKey(key), key))
+    return sorted(matches)
+
+
+def test_search_similar_matches_brute_force():
+    rng = random.Random(0)
+    keys = {''.join(rng.choice('aex') for _ in range(rng.randint(1, 8))).capitalize() for _ in range(1000)}
+    keys |= {''.join(rng.choice('abcdefghij') for _ in range(rng.randint(2, 10))).capitalize() for _ in range(1000)}
+    keys |= {'Eeeeex', 'Aaaaa'}
+    index = searchindex.TrigramIndex(keys)
+
+    queries = ['eeeex', 'aaaaaaa', 'axa', 'xx', 'abcab', 'abcabc']
+    queries += [''.join(rng.choice('aexbcd') for _ in range(rng.randint(2, 9))) for _ in range(50)]
+    for query in queries:
+        maxDistance = searchindex.maxDistanceFor(len(query))
+        assert index.searchSimilar(query, maxDistance) == bruteForceSimilar(keys, query, maxDistance), query
+
+
+def test_cancelled_full_text_build_can_be_started_again():
+    entries = [(f'W{i}', {'definitions': [f'meaning {i}'], 'exampleSentences': []}) for i in range(10000)]
+    index = searchindex.WordIndex([name for name, _ in entries], lambda: iter(entries))
+    checks = []
+
+    def cancelLater():
+        checks.append(None)
+        return len(checks) > 1
+
+    with pytest.raises(searchindex.SearchCancelled):
+        index.buildFullText(cancelLater)
+    assert not index.fullTextReady.is_set()
+    assert index.search('meaning', mode=searchindex.SearchMode.TEXT)[0][:1] == ['W0']
+    assert index.fullTextReady.is_set()
+
+
+def test_refined_results_match_brute_force():
+    rng = random.Random(1)
+    keys = sorted({''.join(rng.choice('abcab ') for _ in range(rng.randint(1, 9))).strip().capitalize() or 'A' for _ in range(3000)})
+    typed = searchindex.WordIndex(keys)
+    refined = []
+    refine = typed.refine
+    typed.refine = lambda *args: refined.append(args[1]) or refine(*args)
+    for query in ('abc', 'bca', 'a b', 'cab', 'aab'):
+        for end in range(1, len(query) + 1):
+            folded = searchindex.foldQuery(query[:end])
+            startsWith, includes, _ = typed.search(query[:end])
+            assert (startsWith, includes) == searchindex.WordIndex(keys).search(query[:end])[:2]
+            assert set(startsWith) == {k for k in keys if searchindex.foldKey(k).startswith(folded)}
+            assert set(includes) == {k for k in keys if folded in searchindex.foldKey(k) and not searchindex.foldKey(k).startswith(folded)}
+            assert includes == sorted(includes, key=lambda w: (searchindex.foldKey(w), w))
+    assert refined
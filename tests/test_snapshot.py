@@ -0,0 +1,58 @@
+import json
+import pytest
+import saver
+import snapshot
+
+
+entries = {
+    'Apple': {'imageExists': True, 'imageHash': 'ab' * 32, 'definitions': ['a fruit', 'a company'], 'exampleSentences': ['An apple a day.'], 'fileExtension': 'jpg'},
+    'Übung': {'imageExists': False, 'imageHash': '', 'definitions': ['exercise, practice'], 'exampleSentences': [], 'fileExtension': ''},
+    '日本': {'imageExists': False, 'imageHash': '', 'definitions': [], 'exampleSentences': ['', 'with\nnewline'], 'fileExtension': ''},
+}
+
+
+def test_entry_round_trip():
+    for data in entries.values():
+        blob = snapshot.encodeEntry(data)
+        assert snapshot.decodeEntry(b'xx' + blob, 2, len(blob)) == data
+
+
+def test_entry_with_trailing_bytes_is_rejected():
+    blob = snapshot.encodeEntry(entries['Apple']) + b'\x00'
+    with pytest.raises(ValueError):
+        snapshot.decodeEntry(blob, 0, len(blob))
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'words.snap')
+    data, offsets = snapshot.encodeSnapshot((key, snapshot.encodeEntry(value)) for key, value in entries.items())
+    saver.atomicWrite(path, data)
+
+    reader = snapshot.SnapshotReader(path)
+    try:
+        assert len(reader) == len(entries)
+        assert [key for key, _, _ in reader.items()] == sorted(entries, key=lambda key: key.encode('utf-8'))
+        assert sorted(reader.items()) == sorted(offsets)
+        for key, value in entries.items():
+            assert reader.get(key) == value
+        with pytest.raises(KeyError):
+            reader.get('Pear')
+    finally:
+        reader.close()
+
+
+def test_json_conversion_round_trip(tmp_path):
+    jsonPath, snapshotPath = str(tmp_path / 'words.json'), str(tmp_path / 'words.snap')
+    saver.atomicWrite(jsonPath, json.dumps(entries))
+    assert snapshot.jsonToSnapshot(jsonPath, snapshotPath) == len(entries)
+    saver.atomicWrite(jsonPath, '{}')
+    assert snapshot.snapshotToJson(snapshotPath, jsonPath) == len(entries)
+    with open(jsonPath, encoding='utf-8') as f:
+        assert json.load(f) == entries
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = str(tmp_path / 'words.snap')
+    saver.atomicWrite(path, b'NOTASNAP' + bytes(snapshot.headerStruct.size))
+    with pytest.raises(ValueError):
+        snapshot.SnapshotReader(path)
@@ -0,0 +1,34 @@
+import os
+import threading
+import pytest
+
+QtGui = pytest.importorskip('PyQt5.QtGui')
+import thumbnails
+
+
+def test_concurrent_thumbnail_builds_do_not_collide(tmp_path):
+    source = str(tmp_path / 'source.png')
+    image = QtGui.QImage(400, 300, QtGui.QImage.Format_RGB32)
+    image.fill(0xff0000)
+    assert image.save(source)
+
+    errors = []
+    for trial in range(20):
+        cache = thumbnails.ThumbnailCache(str(tmp_path))
+        barrier = threading.Barrier(4)
+
+        def build():
+            barrier.wait()
+            try:
+                assert not cache.get(source, f'hash{trial}').isNull()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=build) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert sorted(os.listdir(cache.thumbnailFolder)) == sorted(f'hash{trial}_128.png' for trial in range(20))
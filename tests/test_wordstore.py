@@ -0,0 +1,107 @@
+import pytest
+import wordstore
+
+
+def entry(definition: str):
+    return {'imageExists': False, 'imageHash': '', 'definitions': [definition], 'exampleSentences': [], 'fileExtension': ''}
+
+
+def openStore(folder, backend):
+    store = wordstore.openWordStore(str(folder), backend)
+    store.load()
+    return store
+
+
+@pytest.mark.parametrize('backend', ['json', 'binary'])
+def test_torn_journal_line_does_not_swallow_later_records(tmp_path, backend):
+    store = openStore(tmp_path, backend)
+    store.put('A', entry('a'))
+    journalPath = store.journalPath
+    store.close()
+
+    with open(journalPath, 'a', encoding='utf-8') as f:
+        f.write('{"op": "put", "word": "B", "da')
+
+    store = openStore(tmp_path, backend)
+    assert sorted(store.keys()) == ['A']
+    store.put('C', entry('c'))
+    store.close()
+
+    store = openStore(tmp_path, backend)
+    assert sorted(store.keys()) == ['A', 'C']
+    assert store.get('C') == entry('c')
+    store.close()
+
+
+def test_complete_last_record_without_newline_is_kept(tmp_path):
+    store = openStore(tmp_path, 'json')
+    journalPath = store.journalPath
+    store.close()
+
+    with open(journalPath, 'a', encoding='utf-8') as f:
+        f.write('{"op": "put", "word": "B", "data": {"imageExists": false, "imageHash": "", "definitions": ["b"], "exampleSentences": [], "fileExtension": ""}}')
+
+    store = openStore(tmp_path, 'json')
+    store.put('C', entry('c'))
+    store.close()
+
+    store = openStore(tmp_path, 'json')
+    assert sorted(store.keys()) == ['B', 'C']
+    store.close()
+
+
+@pytest.mark.parametrize('backend', ['json', 'binary'])
+def test_put_many_keeps_only_offsets_in_lazy_mode(tmp_path, backend):
+    store = wordstore.openWordStore(str(tmp_path), backend, lazy=True)
+    store.load()
+    store.putMany([(f'w{i}', entry(str(i))) for i in range(100)])
+    store.putMany([(f'w{i}', entry(str(-i))) for i in range(50, 150)])
+    assert all(isinstance(store.words[f'w{i}'], wordstore.LazyEntry) for i in range(150))
+    assert store.get('w10') == entry('10')
+    assert store.get('w60') == entry('-60')
+    store.close()
+
+    store = openStore(tmp_path, backend)
+    assert len(store) == 150
+    assert store.get('w149') == entry('-149')
+    store.close()
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    store = openStore(tmp_path, 'sqlite')
+    data = {'imageExists': True, 'imageHash': 'abc', 'definitions': ['second', 'first'], 'exampleSentences': ['x', 'y', 'z'], 'fileExtension': 'png'}
+    store.put('Apple', data)
+    store.putMany([('Pear', entry('p')), ('Plum', entry('q'))])
+    store.remove('Plum')
+    store.close()
+
+    store = openStore(tmp_path, 'sqlite')
+    assert sorted(store.keys()) == ['Apple', 'Pear']
+    assert store.get('Apple') == data
+    assert 'Plum' not in store and len(store) == 2
+    assert dict(store.iterEntries()) == {'Apple': data, 'Pear': entry('p')}
+    with pytest.raises(KeyError):
+        store.get('Plum')
+    # The definitions and sentences of a removed word go with it
+    assert store.connection.execute('SELECT COUNT(*) FROM definitions').fetchone()[0] == 3
+    store.close()
+
+
+def test_sqlite_store_keys_ignore_case(tmp_path):
+    store = openStore(tmp_path, 'sqlite')
+    store.put('Apple', entry('old'))
+    store.put('APPLE', entry('new'))
+    assert store.keys() == ['APPLE']
+    assert 'apple' in store
+    assert store.get('apple') == entry('new')
+    store.close()
+
+
+def test_sqlite_store_takes_over_the_json_words(tmp_path):
+    store = openStore(tmp_path, 'json')
+    store.putMany([('Apple', entry('a')), ('Pear', entry('p'))])
+    store.close()
+
+    store = openStore(tmp_path, 'sqlite')
+    assert dict(store.iterEntries()) == {'Apple': entry('a'), 'Pear': entry('p')}
+    store.close()
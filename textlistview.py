@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from PyQt5 import QtCore, QtGui, QtWidgets
+import wordlistmodel
+
+
+# Numbers the texts like "1. text". Rows are handed out in small batches since each one is word wrapped.
+class NumberedTextModel(wordlistmodel.WordListModel):
+    fetchBatchSize = 32
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and index.isValid() and index.row() < self.fetched:
+            return f'{index.row() + 1}. {self.words[index.row()]}'
+        return None
+
+
+# Draws each row as word wrapped text. The QTextLayout of a row is computed once for a text and width
+# and kept in an LRU, so sizeHint and paint, which both need it and are called again on every scroll and repaint, reuse it.
+class WrappedTextDelegate(QtWidgets.QStyledItemDelegate):
+    cacheSize = 256
+    padding = 4
+
+    def __init__(self, font: QtGui.QFont, parent=None):
+        super().__init__(parent)
+        self.font = font
+        self.layouts = OrderedDict()
+
+    def layoutFor(self, text: str, width: int):
+        key = (text, width)
+        layout = self.layouts.get(key)
+        if layout is not None:
+            self.layouts.move_to_end(key)
+            return layout
+
+        layout = QtGui.QTextLayout(text, self.font)
+        textOption = QtGui.QTextOption()
+        textOption.setWrapMode(QtGui.QTextOption.WrapAtWordBoundaryOrAnywhere)
+        layout.setTextOption(textOption)
+        layout.beginLayout()
+        height = 0.0
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(width)
+            line.setPosition(QtCore.QPointF(0, height))
+            height += line.height()
+        layout.endLayout()
+
+        self.layouts[key] = layout
+        if len(self.layouts) > self.cacheSize:
+            self.layouts.popitem(last=False)
+        return layout
+
+    # Rows are as wide as the viewport of the view, whatever width the option was given
+    def textWidth(self):
+        return max(1, self.parent().viewport().width() - 2 * self.padding)
+
+    def sizeHint(self, option, index):
+        width = self.textWidth()
+        layout = self.layoutFor(index.data(), width)
+        return QtCore.QSize(width, int(layout.boundingRect().height()) + 1 + 2 * self.padding)
+
+    def paint(self, painter, option, index):
+        layout = self.layoutFor(index.data(), self.textWidth())
+        painter.save()
+        painter.setPen(option.palette.color(QtGui.QPalette.Text))
+        layout.draw(painter, QtCore.QPointF(option.rect.x() + self.padding, option.rect.y() + self.padding))
+        painter.restore()
+
+
+# A read only list of numbered, word wrapped texts. Only the rows in and near the viewport are laid out and painted,
+# so a word with hundreds of example sentences opens as fast as one with a single sentence.
+class NumberedTextView(QtWidgets.QListView):
+    def __init__(self, font: QtGui.QFont, parent=None):
+        super().__init__(parent)
+        self.textModel = NumberedTextModel(parent=self)
+        self.setModel(self.textModel)
+        self.setItemDelegate(WrappedTextDelegate(font, self))
+        self.setResizeMode(QtWidgets.QListView.Adjust)
+        self.setLayoutMode(QtWidgets.QListView.Batched)
+        self.setBatchSize(NumberedTextModel.fetchBatchSize)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.setFocusPolicy(QtCore.Qt.NoFocus)
+
+    def setTexts(self, texts: list):
+        self.textModel.setWords(list(texts))
+        self.scrollToTop()
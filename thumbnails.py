@@ -0,0 +1,88 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from PyQt5 import QtCore, QtGui
+import imagestore
+
+thumbnailSize = 128
+
+
+# Thumbnails are decoded straight at their target size, saved under dictionary_data/thumbnails
+# keyed by the hash of the source image and the size, and kept in memory in an LRU with a byte budget.
+# QImage is used instead of QPixmap so thumbnails can also be produced off the GUI thread.
+class ThumbnailCache:
+    def __init__(self, folder: str, maxBytes: int = 16 * 1024 * 1024):
+        self.thumbnailFolder = f'{folder}/thumbnails'
+        self.maxBytes = maxBytes
+        self.usedBytes = 0
+        self.memory = OrderedDict()
+        self.sourceHashes = dict()
+        self.lock = threading.Lock()
+
+    # Images of the image store are named after their hash, older images are hashed once per session
+    def sourceHash(self, imagePath: str, imageHash: str):
+        if imageHash:
+            return imageHash
+        stat = os.stat(imagePath)
+        cacheKey = (imagePath, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            sourceHash = self.sourceHashes.get(cacheKey)
+        if sourceHash is None:
+            sourceHash = imagestore.hashFile(imagePath)
+            with self.lock:
+                self.sourceHashes[cacheKey] = sourceHash
+        return sourceHash
+
+    def get(self, imagePath: str, imageHash: str = '', size: int = thumbnailSize):
+        key = (self.sourceHash(imagePath, imageHash), size)
+        with self.lock:
+            image = self.memory.get(key)
+            if image is not None:
+                self.memory.move_to_end(key)
+                return image
+
+        thumbnailPath = f'{self.thumbnailFolder}/{key[0]}_{size}.png'
+        image = QtGui.QImage(thumbnailPath) if os.path.exists(thumbnailPath) else QtGui.QImage()
+        if image.isNull():
+            image = self.decodeScaled(imagePath, size)
+            if image.isNull():
+                return image
+            self.saveThumbnail(image, thumbnailPath)
+
+        self.remember(key, image)
+        return image
+
+    def decodeScaled(self, imagePath: str, size: int):
+        reader = QtGui.QImageReader(imagePath)
+        reader.setAutoTransform(True)
+        sourceSize = reader.size()
+        if sourceSize.isValid():
+            reader.setScaledSize(sourceSize.scaled(size, size, QtCore.Qt.KeepAspectRatio))
+        return reader.read()
+
+    # The prefetcher and the GUI thread can build the same thumbnail at once, so each save goes through its own
+    # temporary file and whichever replace lands last wins with an identical, complete thumbnail
+    def saveThumbnail(self, image: QtGui.QImage, thumbnailPath: str):
+        os.makedirs(self.thumbnailFolder, exist_ok=True)
+        fd, tmpPath = tempfile.mkstemp(prefix=os.path.basename(thumbnailPath) + '.', suffix='.tmp.png', dir=self.thumbnailFolder)
+        os.close(fd)
+        try:
+            if image.save(tmpPath, 'PNG'):
+                os.replace(tmpPath, thumbnailPath)
+        except OSError:
+            # Only the file on disk is lost, the thumbnail is still remembered in memory
+            pass
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+
+    def remember(self, key, image: QtGui.QImage):
+        with self.lock:
+            if key in self.memory:
+                self.usedBytes -= self.memory.pop(key).sizeInBytes()
+            self.memory[key] = image
+            self.usedBytes += image.sizeInBytes()
+            while self.usedBytes > self.maxBytes and len(self.memory) > 1:
+                _, evicted = self.memory.popitem(last=False)
+                self.usedBytes -= evicted.sizeInBytes()
@@ -1,41 +1,69 @@
 import os
+import sys
 import shutil
 
 dataFoldername = 'dictionary_data'
 
+
+# Every word, definition and sentence is stored in this form
+def modifyWord(word: str):
+    word = word.lower().strip().capitalize()
+    return word
+
+
 class Word:
-    def __init__(self, word: str = None, imagePath: str = None, definitions: list = None, exampleSentences: list = None):
+    __slots__ = ('word', 'imagePath', 'imageExists', 'imageHash', 'fileExtension', 'definitions', 'exampleSentences')
+
+    def __init__(self, word: str = None, imagePath: str = None, definitions: list = None, exampleSentences: list = None, imageStore=None):
         if not word:
             return
-        self.word = word
+        self.word = sys.intern(word)
 
         self.imagePath = imagePath
         self.imageExists = True
+        self.imageHash = ''
         self.fileExtension = ''
         if not os.path.exists(self.imagePath):
             self.imageExists = False
-        self.copyImageToDataFolder()
+        self.copyImageToDataFolder(imageStore)
 
         self.definitions = definitions
         self.exampleSentences = exampleSentences
 
-    def copyImageToDataFolder(self):
+    # With an image store the image is kept once under its content hash, otherwise it is copied next to words.json
+    def copyImageToDataFolder(self, imageStore=None):
         if not self.imageExists:
+            if imageStore is not None:
+                imageStore.detach(self.word)
             return
 
-        self.fileExtension = self.imagePath.split('.')[-1]
-        self.newImagePath = f'{dataFoldername}/{self.word}.{self.fileExtension}'
-        if self.imagePath != self.newImagePath:
-            shutil.copy2(self.imagePath, self.newImagePath)
+        self.fileExtension = sys.intern(self.imagePath.split('.')[-1])
+        if imageStore is not None:
+            self.imageHash, self.imagePath = imageStore.attach(self.word, self.imagePath, self.fileExtension)
+            imageStore.removeLegacyImage(self.word, self.fileExtension)
+            return
+
+        newImagePath = f'{dataFoldername}/{self.word}.{self.fileExtension}'
+        if self.imagePath != newImagePath:
+            shutil.copy2(self.imagePath, newImagePath)
+        self.imagePath = newImagePath
 
     def getAsDictionary(self):
-        return {'imageExists': self.imageExists,'definitions': self.definitions, 'exampleSentences': self.exampleSentences, 'fileExtension': self.fileExtension}
+        return {'imageExists': self.imageExists, 'imageHash': self.imageHash, 'definitions': self.definitions, 'exampleSentences': self.exampleSentences, 'fileExtension': self.fileExtension}
 
     def loadFromDict(self, wordName: str, dct: dict):
-        self.word = wordName
+        self.word = sys.intern(wordName)
         self.imageExists = dct['imageExists']
+        self.imageHash = dct.get('imageHash', '')
         self.definitions = dct['definitions']
         self.exampleSentences = dct['exampleSentences']
-        self.fileExtension = dct['fileExtension']
+        self.fileExtension = sys.intern(dct['fileExtension'])
         if self.imageExists:
-            self.imagePath = f'{dataFoldername}/{self.word}.{self.fileExtension}'
+            self.imagePath = imagePathFor(self.word, self.imageHash, self.fileExtension)
+
+
+# Words saved before the image store keep their image at dictionary_data/{word}.{ext}
+def imagePathFor(wordName: str, imageHash: str, fileExtension: str):
+    if imageHash:
+        return f'{dataFoldername}/images/{imageHash}.{fileExtension}'
+    return f'{dataFoldername}/{wordName}.{fileExtension}'
@@ -0,0 +1,111 @@
+from PyQt5 import QtCore
+
+
+# A read only list model over a plain list of word names. The view only asks for the rows it paints,
+# and rows are handed out in batches through canFetchMore/fetchMore as the list is scrolled,
+# so showing every word of a big dictionary costs about as much as showing one screen of them.
+class WordListModel(QtCore.QAbstractListModel):
+    fetchBatchSize = 256
+
+    def __init__(self, words: list = None, parent=None):
+        super().__init__(parent)
+        self.words = words if words is not None else []
+        self.fetched = min(len(self.words), self.fetchBatchSize)
+
+    # Takes ownership of the list, the caller must not change it afterwards
+    def setWords(self, words: list):
+        self.beginResetModel()
+        self.words = words
+        self.fetched = min(len(words), self.fetchBatchSize)
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.fetched
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and index.isValid() and index.row() < self.fetched:
+            return self.words[index.row()]
+        return None
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self.fetched < len(self.words)
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        self.fetchUntil(self.fetched + self.fetchBatchSize - 1)
+
+    # Makes sure the given row has been handed to the view
+    def fetchUntil(self, row: int):
+        last = min(row, len(self.words) - 1)
+        if last < self.fetched:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self.fetched, last)
+        self.fetched = last + 1
+        self.endInsertRows()
+
+    def wordAt(self, row: int):
+        return self.words[row]
+
+    # Returns the index of wordName, fetching rows up to it, or an invalid index if it is not listed
+    def indexOf(self, wordName: str):
+        try:
+            row = self.words.index(wordName)
+        except ValueError:
+            return QtCore.QModelIndex()
+        self.fetchUntil(row)
+        return self.index(row)
+
+    def __len__(self):
+        return len(self.words)
+
+
+# An editable list of unique texts, the definitions or sentences of the Add Word menu.
+# A set mirrors the list so duplicates are found in constant time, and addTexts inserts a whole batch with one row insertion.
+class UniqueTextListModel(QtCore.QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.texts = []
+        self.textSet = set()
+
+    def setTexts(self, texts: list):
+        self.beginResetModel()
+        self.texts = list(dict.fromkeys(texts))
+        self.textSet = set(self.texts)
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.texts)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and index.isValid():
+            return self.texts[index.row()]
+        return None
+
+    # Appends the texts that are not listed yet, returns how many were added
+    def addTexts(self, texts):
+        newTexts = []
+        for text in texts:
+            if text and text not in self.textSet:
+                self.textSet.add(text)
+                newTexts.append(text)
+        if newTexts:
+            self.beginInsertRows(QtCore.QModelIndex(), len(self.texts), len(self.texts) + len(newTexts) - 1)
+            self.texts.extend(newTexts)
+            self.endInsertRows()
+        return len(newTexts)
+
+    def removeText(self, row: int):
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        self.textSet.discard(self.texts.pop(row))
+        self.endRemoveRows()
+
+    # Swaps the text at row with its neighbour step rows away, returns False if there is none
+    def moveText(self, row: int, step: int):
+        other = row + step
+        if not 0 <= other < len(self.texts):
+            return False
+        self.texts[row], self.texts[other] = self.texts[other], self.texts[row]
+        self.dataChanged.emit(self.index(min(row, other)), self.index(max(row, other)))
+        return True
+
+    def __len__(self):
+        return len(self.texts)
@@ -0,0 +1,84 @@
+import sys
+import time
+import threading
+import traceback
+from PyQt5 import QtCore
+import saver
+import wordstore
+import imagestore
+import searchindex
+import randomset
+
+
+# Opens the word store and builds the indexes on its own thread, so the main menu can be shown before a word has been read.
+# Everything is handed to the GUI thread at once through loaded, until then none of it may be touched from there.
+# The full-text index is built afterwards on the same thread, stop cancels that build before the store is closed.
+# timings lists how long each step took, for --profile-startup.
+class WordLoader(QtCore.QObject):
+    loaded = QtCore.pyqtSignal()
+    failed = QtCore.pyqtSignal(str)
+    fullTextBuilt = QtCore.pyqtSignal()
+
+    def __init__(self, folder: str, backend: str, backgroundSaver: saver.BackgroundSaver, lazy: bool, imageStore: imagestore.ImageStore, shuffle: bool):
+        super().__init__()
+        self.folder = folder
+        self.backend = backend
+        self.backgroundSaver = backgroundSaver
+        self.lazy = lazy
+        self.imageStore = imageStore
+        self.shuffle = shuffle
+        self.wordStore = None
+        self.wordIndex = None
+        self.randomWords = None
+        self.error = None
+        self.timings = []
+        self.finished = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='WordLoader', daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    # Blocks until loading has finished or failed, the signal is delivered by the next processEvents
+    def wait(self, timeout: float = None):
+        return self.finished.wait(timeout)
+
+    # Waits for loading and cancels the full-text build, the store is not read from this thread anymore afterwards
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+    def run(self):
+        try:
+            started = time.perf_counter()
+            wordStore = wordstore.openWordStore(self.folder, self.backend, self.backgroundSaver, self.lazy)
+            wordStore.load()
+            self.wordStore = wordStore
+            self.timings.append(('load word store', time.perf_counter() - started))
+
+            started = time.perf_counter()
+            self.wordIndex = searchindex.WordIndex(wordStore.keys(), wordStore.iterEntries)
+            self.randomWords = randomset.RandomSet(wordStore.keys(), self.shuffle)
+            self.timings.append(('build indexes', time.perf_counter() - started))
+
+            started = time.perf_counter()
+            self.imageStore.load(wordStore.iterEntries)
+            self.timings.append(('load image refs', time.perf_counter() - started))
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            self.error = e
+            self.failed.emit(str(e))
+        else:
+            self.loaded.emit()
+        finally:
+            self.finished.set()
+        if self.wordIndex is None or self.error is not None:
+            return
+
+        try:
+            self.wordIndex.buildFullText(self.stopping.is_set)
+            self.fullTextBuilt.emit()
+        except searchindex.SearchCancelled:
+            pass
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
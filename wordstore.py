@@ -0,0 +1,549 @@
+import os
+import json
+import threading
+import sys
+import saver
+import word
+import compactwords
+import snapshot
+
+
+# Every place that reads or changes words goes through this interface.
+# Entries are exchanged in the layout of Word.getAsDictionary
+class WordStore:
+    def load(self):
+        raise NotImplementedError
+
+    def get(self, wordName: str):
+        raise NotImplementedError
+
+    def put(self, wordName: str, data: dict):
+        raise NotImplementedError
+
+    def remove(self, wordName: str):
+        raise NotImplementedError
+
+    def keys(self):
+        raise NotImplementedError
+
+    # Adds or replaces many words at once, stores may do this with less work than one put per word
+    def putMany(self, items):
+        for wordName, data in items:
+            self.put(wordName, data)
+
+    # Yields every word with its entry without keeping the entries around
+    def iterEntries(self):
+        for wordName in list(self.keys()):
+            yield wordName, self.get(wordName)
+
+    def __contains__(self, wordName: str):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# Position of an entry inside words.json that has not been parsed yet
+class LazyEntry:
+    __slots__ = ('offset', 'length')
+
+    def __init__(self, offset: int, length: int):
+        self.offset = offset
+        self.length = length
+
+
+# Keeps words.json as a snapshot and records every add, update and remove as one line
+# in an append-only journal. Journal appends and folding the journal back into the snapshot
+# both happen on the saver thread, the GUI only ever touches memory.
+# In lazy mode only the keys and byte offsets from the words.idx sidecar are loaded at startup,
+# entries are parsed out of words.json the first time they are asked for.
+# Parsed entries live in a CompactWordTable, self.words maps every word to its row or LazyEntry.
+class JsonWordStore(WordStore):
+    snapshotFilename = 'words.json'
+    indexFilename = 'words.idx'
+    journalFilename = 'words.journal'
+
+    def __init__(self, folder: str = word.dataFoldername, backgroundSaver: saver.BackgroundSaver = None, lazy: bool = False, compactThreshold: int = 1000):
+        self.folder = folder
+        self.lazy = lazy
+        self.snapshotPath = f'{folder}/{self.snapshotFilename}'
+        self.indexPath = f'{folder}/{self.indexFilename}' if self.indexFilename else None
+        self.journalPath = f'{folder}/{self.journalFilename}'
+        self.compactingPath = f'{folder}/{self.journalFilename}.compacting'
+        self.compactThreshold = compactThreshold
+
+        self.ownsSaver = backgroundSaver is None
+        self.saver = backgroundSaver
+        if self.ownsSaver:
+            self.saver = saver.BackgroundSaver()
+            self.saver.start()
+
+        self.words = dict()
+        self.table = compactwords.CompactWordTable()
+        self.lock = threading.Lock()
+        self.pendingRecords = []
+        self.journalFile = None
+        self.journalEntries = 0
+        self.snapshotFile = None
+
+    def load(self):
+        if not os.path.exists(self.folder):
+            os.mkdir(self.folder)
+        self.loadSnapshot()
+
+        # A compaction that was interrupted leaves its journal behind, it is replayed before the live one
+        self.journalEntries = 0
+        for path in (self.compactingPath, self.journalPath):
+            self.journalEntries += self.replayJournal(path)
+
+        if self.journalEntries >= self.compactThreshold:
+            self.compact()
+
+    def replayJournal(self, path: str):
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        end = 0
+        needsNewline = False
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Only the last line can be torn by a crash, everything before it was complete
+                    break
+                self.applyRecord(record)
+                count += 1
+                end += len(line)
+                needsNewline = not line.endswith(b'\n')
+            size = f.seek(0, os.SEEK_END)
+
+        if size != end or needsNewline:
+            # Cut the torn line off, or the records appended this session would be fused with it and lost on the next replay
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+                if needsNewline:
+                    f.seek(end)
+                    f.write(b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+        return count
+
+    def applyRecord(self, record: dict):
+        if record['op'] == 'put':
+            previous = self.words.get(record['word'])
+            self.words[sys.intern(record['word'])] = self.table.append(record['data'])
+        else:
+            previous = self.words.pop(record['word'], None)
+        if isinstance(previous, int):
+            self.table.release(previous)
+            if self.table.needsRebuild():
+                self.rebuildTable()
+
+    def rebuildTable(self):
+        rows = [data for data in self.words.values() if isinstance(data, int)]
+        self.table, mapping = self.table.rebuilt(rows)
+        for key, data in self.words.items():
+            if isinstance(data, int):
+                self.words[key] = mapping[data]
+
+    def loadSnapshot(self):
+        if not os.path.exists(self.snapshotPath):
+            saver.atomicWrite(self.snapshotPath, '{}')
+
+        if not (self.lazy and self.loadIndex()):
+            with open(self.snapshotPath, encoding='utf-8') as f:
+                self.words = {sys.intern(key): self.table.append(data) for key, data in json.load(f).items()}
+            if self.lazy:
+                # The index is missing or older than words.json, the next compaction writes a fresh one
+                self.compact()
+
+    def openSnapshotFile(self):
+        self.snapshotFile = open(self.snapshotPath, 'rb')
+
+    def closeSnapshotFile(self):
+        if self.snapshotFile is not None:
+            self.snapshotFile.close()
+            self.snapshotFile = None
+
+    def readLazyEntry(self, entry: LazyEntry):
+        self.snapshotFile.seek(entry.offset)
+        return json.loads(self.snapshotFile.read(entry.length))
+
+    def readRawEntry(self, snapshotFile, entry: LazyEntry):
+        snapshotFile.seek(entry.offset)
+        return snapshotFile.read(entry.length)
+
+    # Entries are laid out one by one so that the offset of every value is known,
+    # values that were never parsed are copied over from the old file as they are.
+    # entries is consumed lazily and written in chunks of about chunkSize bytes, so the whole file is never in memory.
+    # Returns the path of the written temporary file and the offset and length of every value.
+    def writeSnapshotFile(self, entries, chunkSize: int = 1 << 20):
+        tmpPath = self.snapshotPath + '.tmp'
+        offsets = []
+        with open(tmpPath, 'wb') as f:
+            chunks = [b'{']
+            chunkBytes = 0
+            position = 1
+            for i, (key, value) in enumerate(entries):
+                prefix = (',\n' if i else '') + json.dumps(key) + ': '
+                prefix = prefix.encode('utf-8')
+                chunks.append(prefix)
+                chunks.append(value)
+                position += len(prefix)
+                offsets.append((key, position, len(value)))
+                position += len(value)
+                chunkBytes += len(prefix) + len(value)
+                if chunkBytes >= chunkSize:
+                    f.write(b''.join(chunks))
+                    chunks = []
+                    chunkBytes = 0
+            chunks.append(b'}')
+            f.write(b''.join(chunks))
+            f.flush()
+            os.fsync(f.fileno())
+        return tmpPath, offsets
+
+    def encodeEntry(self, data: dict):
+        return json.dumps(data).encode('utf-8')
+
+    def loadIndex(self):
+        if not os.path.exists(self.indexPath):
+            return False
+        try:
+            with open(self.indexPath, encoding='utf-8') as f:
+                index = json.load(f)
+        except ValueError:
+            return False
+        stat = os.stat(self.snapshotPath)
+        if index['size'] != stat.st_size or index['mtime'] != stat.st_mtime_ns:
+            return False
+
+        self.words = {sys.intern(key): LazyEntry(offset, length) for key, offset, length in index['entries']}
+        self.openSnapshotFile()
+        return True
+
+    def writeIndex(self, offsets: list):
+        stat = os.stat(self.snapshotPath)
+        index = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'entries': offsets}
+        saver.atomicWrite(self.indexPath, json.dumps(index))
+
+    def get(self, wordName: str):
+        with self.lock:
+            data = self.words[wordName]
+            if not isinstance(data, LazyEntry):
+                return self.table.get(data)
+            data = self.readLazyEntry(data)
+            self.words[wordName] = self.table.append(data)
+        return data
+
+    def iterEntries(self):
+        for wordName in list(self.words.keys()):
+            with self.lock:
+                data = self.words.get(wordName)
+                if data is None:
+                    continue
+                data = self.readLazyEntry(data) if isinstance(data, LazyEntry) else self.table.get(data)
+            yield wordName, data
+
+    def keys(self):
+        return self.words.keys()
+
+    def __contains__(self, wordName: str):
+        return wordName in self.words
+
+    def __len__(self):
+        return len(self.words)
+
+    def put(self, wordName: str, data: dict):
+        self.writeRecord({'op': 'put', 'word': wordName, 'data': data})
+
+    def remove(self, wordName: str):
+        self.writeRecord({'op': 'remove', 'word': wordName})
+
+    # Bulk imports skip the journal, the words reach disk with the compaction that follows.
+    # putMany waits for that compaction, which in lazy mode turns the batch back into offsets into the file,
+    # so feeding a big import in batches only ever keeps about one batch in memory.
+    def putMany(self, items):
+        if not items:
+            return
+        with self.lock:
+            for wordName, data in items:
+                self.applyRecord({'op': 'put', 'word': wordName, 'data': data})
+        self.compact()
+        self.saver.flush()
+
+    def writeRecord(self, record: dict):
+        with self.lock:
+            self.applyRecord(record)
+            self.pendingRecords.append(json.dumps(record) + '\n')
+            self.journalEntries += 1
+            needsCompaction = self.journalEntries >= self.compactThreshold
+        self.saver.schedule(self.journalPath, self.writePendingRecords)
+        if needsCompaction:
+            self.compact()
+
+    # Runs on the saver thread
+    def writePendingRecords(self):
+        with self.lock:
+            records = self.pendingRecords
+            self.pendingRecords = []
+        if not records:
+            return
+        if self.journalFile is None:
+            self.journalFile = open(self.journalPath, 'a', encoding='utf-8')
+        self.journalFile.write(''.join(records))
+        self.journalFile.flush()
+        os.fsync(self.journalFile.fileno())
+
+    def compact(self):
+        with self.lock:
+            self.journalEntries = 0
+        self.saver.schedule(self.snapshotPath, self.writeSnapshot)
+
+    # Runs on the saver thread, folds the journal into words.json
+    def writeSnapshot(self):
+        self.writePendingRecords()
+        if self.journalFile is not None:
+            self.journalFile.close()
+            self.journalFile = None
+
+        if os.path.exists(self.journalPath):
+            if os.path.exists(self.compactingPath):
+                # The previous compaction did not finish, keep its records in front of the new ones
+                with open(self.compactingPath, 'a', encoding='utf-8') as old, open(self.journalPath, encoding='utf-8') as f:
+                    old.write(f.read())
+                os.remove(self.journalPath)
+            else:
+                os.replace(self.journalPath, self.compactingPath)
+
+        with self.lock:
+            snapshot = dict(self.words)
+            table = self.table
+
+        with open(self.snapshotPath, 'rb') as old:
+            entries = ((key, self.readRawEntry(old, data) if isinstance(data, LazyEntry) else self.encodeEntry(table.get(data)))
+                       for key, data in snapshot.items())
+            tmpPath, offsets = self.writeSnapshotFile(entries)
+
+        with self.lock:
+            # The snapshot cannot be replaced while it is open on Windows
+            self.closeSnapshotFile()
+            os.replace(tmpPath, self.snapshotPath)
+            for key, offset, length in offsets:
+                written = snapshot[key]
+                if isinstance(written, LazyEntry):
+                    if self.words.get(key) is written:
+                        self.words[key] = LazyEntry(offset, length)
+                elif self.lazy and self.table is table and self.words.get(key) == written:
+                    # Rows are never reused within a table, so the row is still the one that was written.
+                    # It is read back from the file from now on and its memory goes with the next table rebuild.
+                    self.words[key] = LazyEntry(offset, length)
+                    self.table.release(written)
+            if self.table.needsRebuild():
+                self.rebuildTable()
+            if self.lazy:
+                self.openSnapshotFile()
+
+        saver.syncDirectory(self.folder)
+        if self.indexPath is not None:
+            self.writeIndex(offsets)
+        if os.path.exists(self.compactingPath):
+            os.remove(self.compactingPath)
+
+    def close(self):
+        self.saver.flush()
+        if self.ownsSaver:
+            self.saver.stop()
+        if self.journalFile is not None:
+            self.journalFile.close()
+            self.journalFile = None
+        self.closeSnapshotFile()
+
+
+# Same journal as the json backend on top of the binary words.snap, which is always read lazily
+# through mmap. The first start on this backend takes over the words saved by the json backend.
+class BinaryWordStore(JsonWordStore):
+    snapshotFilename = 'words.snap'
+    indexFilename = None
+    journalFilename = 'words.snap.journal'
+
+    def __init__(self, folder: str = word.dataFoldername, backgroundSaver: saver.BackgroundSaver = None, lazy: bool = True, compactThreshold: int = 1000):
+        super().__init__(folder, backgroundSaver, True, compactThreshold)
+
+    def loadSnapshot(self):
+        if not os.path.exists(self.snapshotPath):
+            jsonStore = JsonWordStore(self.folder)
+            if os.path.exists(jsonStore.snapshotPath):
+                jsonStore.load()
+                entries = [(key, snapshot.encodeEntry(jsonStore.get(key))) for key in jsonStore.keys()]
+                jsonStore.close()
+            else:
+                entries = []
+            saver.atomicWrite(self.snapshotPath, snapshot.encodeSnapshot(entries)[0])
+
+        self.openSnapshotFile()
+        self.words = {sys.intern(key): LazyEntry(offset, length) for key, offset, length in self.snapshotFile.items()}
+
+    def openSnapshotFile(self):
+        self.snapshotFile = snapshot.SnapshotReader(self.snapshotPath)
+
+    def readLazyEntry(self, entry: LazyEntry):
+        return self.snapshotFile.decode(entry.offset, entry.length)
+
+    def readRawEntry(self, snapshotFile, entry: LazyEntry):
+        with self.lock:
+            return self.snapshotFile.blob(entry.offset, entry.length)
+
+    def writeSnapshotFile(self, entries):
+        data, offsets = snapshot.encodeSnapshot(entries)
+        return saver.writeTemporary(self.snapshotPath, data), offsets
+
+    def encodeEntry(self, data: dict):
+        return snapshot.encodeEntry(data)
+
+
+# Keeps every word in an SQLite database. Words are looked up through an index on their
+# normalized key, definitions and example sentences live in child tables ordered by position.
+class SqliteWordStore(WordStore):
+    # Rows are always read on demand, so lazy has nothing to change here
+    def __init__(self, folder: str = word.dataFoldername, backgroundSaver: saver.BackgroundSaver = None, lazy: bool = False):
+        self.folder = folder
+        self.databasePath = f'{folder}/words.sqlite3'
+        self.connection = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalizeKey(wordName: str):
+        return wordName.casefold()
+
+    def load(self):
+        if not os.path.exists(self.folder):
+            os.mkdir(self.folder)
+        isNew = not os.path.exists(self.databasePath)
+
+        # Imported here since only this backend needs it
+        import sqlite3
+        self.connection = sqlite3.connect(self.databasePath, check_same_thread=False)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        # Commits in WAL mode are atomic and only append to the log, so they stay cheap on the GUI thread
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS words (
+                id INTEGER PRIMARY KEY,
+                word TEXT NOT NULL,
+                word_key TEXT NOT NULL,
+                image_exists INTEGER NOT NULL,
+                image_hash TEXT NOT NULL DEFAULT '',
+                file_extension TEXT NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS words_word_key ON words (word_key);
+            CREATE TABLE IF NOT EXISTS definitions (
+                word_id INTEGER NOT NULL REFERENCES words (id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (word_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS example_sentences (
+                word_id INTEGER NOT NULL REFERENCES words (id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (word_id, position)
+            );
+        ''')
+        columns = [r[1] for r in self.connection.execute('PRAGMA table_info(words)')]
+        if 'image_hash' not in columns:
+            self.connection.execute("ALTER TABLE words ADD COLUMN image_hash TEXT NOT NULL DEFAULT ''")
+
+        # The first start on this backend takes over the words saved by the json backend
+        jsonStorePath = f'{self.folder}/words.json'
+        if isNew and os.path.exists(jsonStorePath):
+            jsonStore = JsonWordStore(self.folder)
+            jsonStore.load()
+            with self.lock, self.connection:
+                for wordName in jsonStore.keys():
+                    self.insertWord(wordName, jsonStore.get(wordName))
+            jsonStore.close()
+
+    def insertWord(self, wordName: str, data: dict):
+        cursor = self.connection.execute(
+            'INSERT INTO words (word, word_key, image_exists, image_hash, file_extension) VALUES (?, ?, ?, ?, ?)',
+            (wordName, self.normalizeKey(wordName), int(data['imageExists']), data.get('imageHash', ''), data['fileExtension'])
+        )
+        wordId = cursor.lastrowid
+        self.connection.executemany(
+            'INSERT INTO definitions (word_id, position, text) VALUES (?, ?, ?)',
+            [(wordId, i, d) for i, d in enumerate(data['definitions'])]
+        )
+        self.connection.executemany(
+            'INSERT INTO example_sentences (word_id, position, text) VALUES (?, ?, ?)',
+            [(wordId, i, es) for i, es in enumerate(data['exampleSentences'])]
+        )
+
+    def get(self, wordName: str):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT id, image_exists, image_hash, file_extension FROM words WHERE word_key = ?', (self.normalizeKey(wordName),)
+            ).fetchone()
+            if row is None:
+                raise KeyError(wordName)
+            wordId, imageExists, imageHash, fileExtension = row
+            definitions = [r[0] for r in self.connection.execute(
+                'SELECT text FROM definitions WHERE word_id = ? ORDER BY position', (wordId,)
+            )]
+            exampleSentences = [r[0] for r in self.connection.execute(
+                'SELECT text FROM example_sentences WHERE word_id = ? ORDER BY position', (wordId,)
+            )]
+        return {'imageExists': bool(imageExists), 'imageHash': imageHash, 'definitions': definitions, 'exampleSentences': exampleSentences, 'fileExtension': fileExtension}
+
+    def put(self, wordName: str, data: dict):
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM words WHERE word_key = ?', (self.normalizeKey(wordName),))
+            self.insertWord(wordName, data)
+
+    def putMany(self, items):
+        with self.lock, self.connection:
+            for wordName, data in items:
+                self.connection.execute('DELETE FROM words WHERE word_key = ?', (self.normalizeKey(wordName),))
+                self.insertWord(wordName, data)
+
+    def remove(self, wordName: str):
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM words WHERE word_key = ?', (self.normalizeKey(wordName),))
+
+    def keys(self):
+        with self.lock:
+            return [r[0] for r in self.connection.execute('SELECT word FROM words')]
+
+    def __contains__(self, wordName: str):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT 1 FROM words WHERE word_key = ?', (self.normalizeKey(wordName),)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM words').fetchone()[0]
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+backends = {
+    'json': JsonWordStore,
+    'sqlite': SqliteWordStore,
+    'binary': BinaryWordStore,
+}
+
+
+def openWordStore(folder: str = word.dataFoldername, backend: str = 'json', backgroundSaver: saver.BackgroundSaver = None, lazy: bool = False):
+    if backend not in backends:
+        raise ValueError(f'Unknown word store backend "{backend}", expected one of: {", ".join(backends)}')
+    return backends[backend](folder, backgroundSaver, lazy)